@@ -34,6 +34,10 @@ app.register_blueprint(questions_bp, url_prefix='/api')
 app.register_blueprint(chat_bp, url_prefix='/api')
 app.register_blueprint(auth_bp, url_prefix='/api')
 
+# Load keywords, catalog and scoring matrices before the first request needs them
+from services.recommender import get_recommender
+get_recommender().warm_up()
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -33,5 +33,8 @@ collections = {
     'skill_keywords': db.skill_keywords if db is not None else None,
     'student_progress': db.student_progress if db is not None else None,
     'users': db.users if db is not None else None,
+    'catalog_meta': db.catalog_meta if db is not None else None,
+    'recommendations': db.recommendations if db is not None else None,
+    'skill_profiles': db.skill_profiles if db is not None else None,
 }
 
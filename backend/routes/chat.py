@@ -3,10 +3,10 @@ Routes for chat assistant
 """
 from flask import Blueprint, jsonify, request
 from db import collections
-from services.recommender import RecommenderService
+from services.recommender import get_recommender
 
 chat_bp = Blueprint('chat', __name__)
-recommender = RecommenderService()
+recommender = get_recommender()
 
 def analyze_question_intent(message: str) -> str:
     """Analyze question to determine intent"""
@@ -59,19 +59,19 @@ def chat():
                 }
             }), 200
         
-        # Get user progress
-        user_progress = []
-        if collections['student_progress'] is not None:
-            user_progress = list(collections['student_progress'].find(
-                {'email': email},
-                {'_id': 0}
-            ))
-        
         # Generate response based on intent
         response_text = ""
         response_type = intent
         
         if intent == 'progress':
+            # Get user progress
+            user_progress = []
+            if collections['student_progress'] is not None:
+                user_progress = list(collections['student_progress'].find(
+                    {'email': email},
+                    {'_id': 0}
+                ))
+            
             # Analyze progress
             total_courses = len(user_progress)
             completed_courses = sum(1 for p in user_progress if p.get('is_graduated', 0) == 1)
@@ -91,11 +91,7 @@ def chat():
         
         elif intent == 'recommendation':
             # Get recommendations
-            recommendations = recommender.get_recommendations(
-                user_email=email,
-                user_progress=user_progress,
-                user_preferences=user.get('preferences', {})
-            )
+            recommendations = recommender.get_user_recommendations(user)
             
             if recommendations['recommended_courses']:
                 top_course = recommendations['recommended_courses'][0]
@@ -113,9 +109,8 @@ def chat():
                 response_text = "Silakan pilih kursus dari katalog untuk memulai belajar!"
         
         elif intent == 'skill':
-            # Analyze skills
-            completed_skills = recommender._extract_completed_skills(user_progress)
-            weak_skills = recommender._identify_weak_skills(user_progress)
+            # Analyze skills from the stored skill profile
+            completed_skills, weak_skills = recommender.get_skill_profile(email)
             
             if completed_skills:
                 top_skills = sorted(completed_skills.items(), key=lambda x: x[1], reverse=True)[:3]
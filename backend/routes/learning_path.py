@@ -6,6 +6,8 @@ from flask import Blueprint, jsonify, request
 import requests
 import os
 from db import collections
+from services.catalog import catalog_store
+from services.similar_courses import similar_courses_store
 
 learning_path_bp = Blueprint('learning_path', __name__)
 
@@ -66,6 +68,46 @@ def get_courses():
             pass
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@learning_path_bp.route('/courses/<int:course_id>/similar', methods=['GET'])
+def get_similar_courses(course_id):
+    """Get courses often taken together with a course (precomputed neighbour table)"""
+    limit = request.args.get('limit', 10, type=int)
+    if not 1 <= limit <= 50:
+        return jsonify({'success': False, 'error': 'limit must be between 1 and 50'}), 400
+    
+    try:
+        courses_by_id = catalog_store.get().courses_by_id
+        if course_id not in courses_by_id:
+            return jsonify({'success': False, 'error': 'Course not found'}), 404
+        
+        # Empty until ml/scripts/build_similarity_index.py has been run
+        index = similar_courses_store.get()
+        neighbours = index.similar(course_id, limit) if index is not None else []
+        
+        similar = []
+        for similar_id, similarity in neighbours:
+            course = courses_by_id.get(similar_id)
+            if course is None:
+                continue
+            similar.append({
+                'course_id': similar_id,
+                'course_name': course.get('course_name'),
+                'learning_path_id': course.get('learning_path_id'),
+                'level': course.get('course_level_str'),
+                'hours': course.get('hours_to_study'),
+                'similarity': round(similarity, 4)
+            })
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'course_id': course_id,
+                'similar_courses': similar
+            }
+        }), 200
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @learning_path_bp.route('/tutorials', methods=['GET'])
 def get_tutorials():
     """Get tutorials, optionally filtered by course_id"""
@@ -1,10 +1,15 @@
 """
 Routes for student progress tracking
 """
+from datetime import datetime
 from flask import Blueprint, jsonify, request
+from pymongo import ReturnDocument
 from db import collections
+from services.cache import bump_progress_version
+from services.recommender import get_recommender
 
 progress_bp = Blueprint('progress', __name__)
+recommender = get_recommender()
 
 @progress_bp.route('/progress', methods=['GET'])
 def get_progress():
@@ -127,16 +132,27 @@ def update_progress():
         if 'exam_score' in data:
             update_doc['exam_score'] = data['exam_score']
         
-        # Upsert progress
-        result = collections['student_progress'].update_one(
+        # Watermark for incremental feature store refreshes
+        update_doc['updated_at'] = datetime.utcnow().isoformat()
+        
+        # Upsert progress, keeping the previous row to diff the skill profile
+        old_progress = collections['student_progress'].find_one_and_update(
             query,
             {'$set': update_doc},
-            upsert=True
+            projection={'_id': 0},
+            upsert=True,
+            return_document=ReturnDocument.BEFORE
         )
         
         # Get updated progress
         updated_progress = collections['student_progress'].find_one(query, {'_id': 0})
         
+        # Apply only this row's change to the stored skill profile
+        recommender.update_skill_profile(data['email'], old_progress, updated_progress)
+        
+        # Cached recommendations for this user are now stale
+        bump_progress_version(data['email'])
+        
         return jsonify({
             'success': True,
             'data': updated_progress
@@ -1,12 +1,29 @@
 """
 Routes for course recommendations
 """
-from flask import Blueprint, jsonify, request
-from services.recommender import RecommenderService
+import hmac
+import json
+import os
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from services.recommender import get_recommender, DEFAULT_PAGE_SIZE
+from services.cache import recommendation_cache
+from services.catalog import bump_catalog_version
 from db import collections
 
 recommendation_bp = Blueprint('recommendation', __name__)
-recommender = RecommenderService()
+recommender = get_recommender()
+
+MAX_BATCH_USERS = int(os.getenv('MAX_BATCH_USERS', 10000))
+MAX_PAGE_SIZE = int(os.getenv('MAX_RECOMMENDATION_PAGE_SIZE', 50))
+
+# Required in the X-Admin-Token header of admin endpoints; without it they are disabled
+ADMIN_TOKEN = os.getenv('ADMIN_TOKEN')
+
+
+def is_admin_request():
+    """Whether the request carries the configured admin token (False if none is configured)"""
+    token = request.headers.get('X-Admin-Token') or ''
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8'))
 
 @recommendation_bp.route('/recommendation', methods=['GET'])
 def get_recommendation():
@@ -17,6 +34,13 @@ def get_recommendation():
     if not user_id and not email:
         return jsonify({'success': False, 'error': 'user_id or email required'}), 400
     
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    cursor = request.args.get('cursor', 0, type=int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        return jsonify({'success': False, 'error': f'limit must be between 1 and {MAX_PAGE_SIZE}'}), 400
+    if cursor < 0:
+        return jsonify({'success': False, 'error': 'cursor must be a non-negative integer'}), 400
+    
     try:
         # Get user data
         query = {}
@@ -33,20 +57,8 @@ def get_recommendation():
         if not user:
             return jsonify({'success': False, 'error': 'User not found'}), 404
         
-        # Get user progress
-        user_progress = []
-        if collections['student_progress'] is not None:
-            user_progress = list(collections['student_progress'].find(
-                {'email': user.get('email')},
-                {'_id': 0}
-            ))
-        
-        # Get recommendations
-        recommendations = recommender.get_recommendations(
-            user_email=user.get('email'),
-            user_progress=user_progress,
-            user_preferences=user.get('preferences', {})
-        )
+        # Get recommendations (cached per user and progress version)
+        recommendations = recommender.get_user_recommendations(user, limit=limit, cursor=cursor)
         
         return jsonify({
             'success': True,
@@ -80,3 +92,84 @@ def get_onboarding_recommendation():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@recommendation_bp.route('/recommendation/batch', methods=['POST'])
+def get_batch_recommendation():
+    """Get recommendations for many users, streamed back as NDJSON (one user per line)"""
+    data = request.get_json(silent=True) or {}
+    emails = data.get('emails')
+    user_ids = data.get('user_ids')
+    
+    if not emails and not user_ids:
+        return jsonify({'success': False, 'error': 'emails or user_ids required'}), 400
+    
+    values = emails or user_ids
+    if not isinstance(values, list):
+        return jsonify({'success': False, 'error': 'emails/user_ids must be a list'}), 400
+    if len(values) > MAX_BATCH_USERS:
+        return jsonify({'success': False, 'error': f'At most {MAX_BATCH_USERS} users per request'}), 400
+    
+    if emails:
+        field = 'email'
+        keys = emails
+    else:
+        from bson import ObjectId
+        from bson.errors import InvalidId
+        field = '_id'
+        try:
+            keys = [ObjectId(user_id) for user_id in user_ids]
+        except (InvalidId, TypeError) as e:
+            return jsonify({'success': False, 'error': str(e)}), 400
+    
+    def generate():
+        try:
+            for key, user, recommendations in recommender.iter_user_recommendations(field, keys):
+                if user is None:
+                    line = {'success': False, 'error': 'User not found'}
+                else:
+                    line = {
+                        'success': True,
+                        'user_id': str(user['_id']),
+                        'email': user.get('email'),
+                        'data': recommendations
+                    }
+                if field == 'email':
+                    line.setdefault('email', key)
+                else:
+                    line.setdefault('user_id', str(key))
+                yield json.dumps(line, default=str) + '\n'
+        except Exception as e:
+            yield json.dumps({'success': False, 'error': str(e)}) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@recommendation_bp.route('/recommendation/cache/stats', methods=['GET'])
+def get_recommendation_cache_stats():
+    """Get hit/miss/eviction counters of the recommendation cache"""
+    return jsonify({
+        'success': True,
+        'data': recommendation_cache.stats()
+    }), 200
+
+@recommendation_bp.route('/recommendation/reload', methods=['POST'])
+def reload_recommender():
+    """Reload skill keywords and the course catalog without restarting the server"""
+    if not is_admin_request():
+        return jsonify({'success': False, 'error': 'Forbidden'}), 403
+    
+    try:
+        # Other worker processes pick the change up through the catalog version check
+        bump_catalog_version()
+        state = recommender.reload()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'catalog_version': state.catalog.version,
+                'keywords_version': state.keywords_version,
+                'courses': len(state.catalog.courses),
+                'skill_keywords': len(state.skill_keywords)
+            }
+        }), 200
+    
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
@@ -102,7 +102,12 @@ def update_user(user_id):
         if not update_doc:
             return jsonify({'success': False, 'error': 'No fields to update'}), 400
         
-        result = collections['users'].update_one(query, {'$set': update_doc})
+        update = {'$set': update_doc}
+        if 'preferences' in update_doc:
+            # Preferences change recommendations, invalidate cached results
+            update['$inc'] = {'progress_version': 1}
+        
+        result = collections['users'].update_one(query, update)
         
         if result.matched_count == 0:
             return jsonify({'success': False, 'error': 'User not found'}), 404
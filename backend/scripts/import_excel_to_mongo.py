@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 # Add parent directory to path to import db module
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from db import db, collections
+from services.catalog import bump_catalog_version, bump_progress_generation
 
 load_dotenv()
 
@@ -244,6 +245,9 @@ def import_resource_data():
         df_progress = pd.read_excel(file_path, sheet_name='Student Progress')
         print(f"  → Sheet 'Student Progress': {len(df_progress)} rows")
         
+        # Watermark for incremental feature store refreshes; the collection is
+        # replaced, so the generation bump below forces a full refresh
+        imported_at = datetime.utcnow().isoformat()
         progress_data = []
         for _, row in df_progress.iterrows():
             doc = {
@@ -257,14 +261,29 @@ def import_resource_data():
                 'final_submission_id': clean_data(row.get('final_submission_id')),
                 'submission_rating': clean_data(row.get('submission_rating')),
                 'final_exam_id': clean_data(row.get('final_exam_id')),
-                'exam_score': clean_data(row.get('exam_score'))
+                'exam_score': clean_data(row.get('exam_score')),
+                'updated_at': imported_at
             }
             progress_data.append(doc)
         
         if collections['student_progress']:
             collections['student_progress'].delete_many({})
             collections['student_progress'].insert_many(progress_data)
+            collections['student_progress'].create_index('updated_at')
             print(f"  [OK] Inserted {len(progress_data)} documents to student_progress")
+            
+            # Rows deleted above would survive an incremental feature store refresh
+            bump_progress_generation()
+            print("  [OK] Bumped student_progress generation (next ML feature store refresh is full)")
+            
+            # Skill profiles and cached / materialized recommendations were
+            # derived from the replaced progress
+            if collections['skill_profiles'] is not None:
+                collections['skill_profiles'].delete_many({})
+                print("  [OK] Cleared skill_profiles (rebuilt on next read)")
+            if collections['users'] is not None:
+                collections['users'].update_many({}, {'$inc': {'progress_version': 1}})
+                print("  [OK] Bumped progress_version of every user")
         
         print("  [OK] Resource Data import completed!")
         
@@ -291,6 +310,9 @@ def main():
     # Import Resource Data
     import_resource_data()
     
+    # Tell running API processes to reload their catalog snapshot
+    bump_catalog_version()
+    
     print("\n" + "=" * 60)
     print("[OK] Import completed successfully!")
     print("=" * 60)
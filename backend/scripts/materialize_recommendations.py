@@ -0,0 +1,185 @@
+"""
+Script to precompute recommendations for every user
+Runs RecommenderService (or the ML service) over all users in chunks across a
+process pool and writes the results to the recommendations collection, one
+document per (email, engine). /api/recommendation serves the rule-based
+documents while they are still current and only computes on the fly as a
+fallback.
+"""
+import os
+import sys
+import time
+import argparse
+import multiprocessing
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dotenv import load_dotenv
+from pymongo import ReplaceOne
+
+# Add parent directory to path to import db module
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+from db import collections
+
+load_dotenv()
+
+CHUNK_SIZE = int(os.getenv('MATERIALIZE_CHUNK_SIZE', 1000))
+
+ML_SERVICES_DIR = os.path.join(BACKEND_DIR, '..', 'ml', 'services')
+
+# Per-worker services, created once by _init_worker
+_recommender = None
+_ml_service = None
+_feature_store = None
+
+
+def _init_worker(engine):
+    """Create the services once per worker process"""
+    global _recommender, _ml_service, _feature_store
+    from services.recommender import get_recommender
+    _recommender = get_recommender()
+
+    if engine == 'ml':
+        sys.path.append(ML_SERVICES_DIR)
+        from ml_recommender import MLRecommenderService
+        from feature_store import FeatureStore
+        _ml_service = MLRecommenderService()
+        _feature_store = FeatureStore()
+
+
+def _rule_based_results(emails):
+    """Yield (user, recommendations) from the rule-based service"""
+    for _, user, recommendations in _recommender.iter_user_recommendations('email', emails):
+        if user is not None:
+            yield user, recommendations
+
+
+def _ml_results(emails):
+    """
+    Yield (user, recommendations) from the ML service, scoring the chunk in one batch
+
+    Progress is read from the ML feature store (refreshed once by main) instead of MongoDB.
+    """
+    users = list(collections['users'].find({'email': {'$in': emails}}))
+    progress_by_email = _feature_store.progress_by_email([user.get('email') for user in users])
+
+    recommendations = _ml_service.recommend_batch(
+        [user.get('email') for user in users],
+        progress_by_email=progress_by_email
+    )
+    yield from zip(users, recommendations)
+
+
+def materialize_chunk(emails, engine, progress_versions=None):
+    """
+    Compute and store recommendations for one chunk of users
+
+    Args:
+        emails: Users of the chunk
+        engine: 'rule' or 'ml'
+        progress_versions: dict of email -> progress_version read before the
+            progress the results are computed from was read (ML engine: before
+            the feature store refresh); default: the version read with the user
+
+    Returns:
+        Number of documents written
+    """
+    # Stamp with the state taken before scoring: if keywords or catalog change
+    # mid-chunk the documents are simply treated as stale
+    state = _recommender.state
+    generated_at = datetime.utcnow().isoformat()
+
+    results = _ml_results(emails) if engine == 'ml' else _rule_based_results(emails)
+
+    operations = []
+    for user, recommendations in results:
+        doc = {
+            'email': user.get('email'),
+            'data': recommendations,
+            'generated_at': generated_at
+        }
+        doc.update(_recommender.materialization_stamp(user, state, engine))
+        if progress_versions is not None:
+            # A write after that point leaves the document stale rather than current
+            doc['progress_version'] = progress_versions.get(doc['email'], 0)
+        operations.append(ReplaceOne({'email': doc['email'], 'engine': engine}, doc, upsert=True))
+
+    if operations:
+        collections['recommendations'].bulk_write(operations, ordered=False)
+    return len(operations)
+
+
+def ensure_indexes():
+    """One document per (email, engine), so engines never overwrite each other's results"""
+    recommendations = collections['recommendations']
+    # Collections materialized before engines were stored side by side
+    if 'email_1' in recommendations.index_information():
+        recommendations.drop_index('email_1')
+    recommendations.create_index([('email', 1), ('engine', 1)], unique=True)
+
+
+def main():
+    """Main materialization function"""
+    parser = argparse.ArgumentParser(description='Precompute recommendations for all users')
+    parser.add_argument('--engine', choices=['rule', 'ml'], default='rule')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Learning Buddy - Materialize Recommendations")
+    print("=" * 60)
+
+    if collections['users'] is None or collections['recommendations'] is None:
+        print("[ERROR] MongoDB connection failed. Please check your MONGO_URI in .env file")
+        return
+
+    ensure_indexes()
+
+    # Read before the feature store refresh, so ML documents are stamped with
+    # the progress_version their (snapshot) progress is at least as new as
+    users = [
+        user for user in collections['users'].find({}, {'_id': 0, 'email': 1, 'progress_version': 1})
+        if user.get('email')
+    ]
+    progress_versions = {user['email']: user.get('progress_version', 0) for user in users}
+
+    if args.engine == 'ml':
+        # Pull progress changed since the last run into the feature store once for all workers
+        sys.path.append(ML_SERVICES_DIR)
+        from feature_store import FeatureStore
+        refresh = FeatureStore().refresh()
+        print(f"[OK] Feature store: {refresh['mode']} refresh, {refresh['pulled']} rows pulled, {refresh['rows']} total")
+
+    emails = [user['email'] for user in users]
+    chunks = [emails[i:i + args.chunk_size] for i in range(0, len(emails), args.chunk_size)]
+    print(f"[OK] {len(emails)} users in {len(chunks)} chunks, {args.workers} workers, engine={args.engine}")
+
+    started = time.time()
+    written = 0
+    # spawn: every worker opens its own MongoDB connection
+    with ProcessPoolExecutor(
+        max_workers=args.workers,
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(args.engine,)
+    ) as pool:
+        futures = [
+            pool.submit(materialize_chunk, chunk, args.engine,
+                        {email: progress_versions[email] for email in chunk} if args.engine == 'ml' else None)
+            for chunk in chunks
+        ]
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                written += future.result()
+            except Exception as e:
+                print(f"  [ERROR] Chunk failed: {e}")
+            print(f"  → {done}/{len(chunks)} chunks, {written} documents written")
+
+    print("\n" + "=" * 60)
+    print(f"[OK] Materialized {written} users in {time.time() - started:.1f}s")
+    print("=" * 60)
+
+
+if __name__ == '__main__':
+    main()
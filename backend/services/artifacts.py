@@ -0,0 +1,156 @@
+"""
+Model artifacts stored as NumPy .npy arrays plus a JSON manifest
+Arrays are loaded with mmap_mode='r', so every worker process maps the same
+pages from the page cache instead of unpickling its own copy.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+import numpy as np
+
+MANIFEST_FILE = 'manifest.json'
+ARTIFACT_FORMAT_VERSION = 1
+
+
+def save_artifact(directory, kind, arrays, metadata=None):
+    """
+    Write arrays and their manifest to directory
+
+    The artifact is written to a temporary directory first and then renamed
+    into place, so readers see either the old or the new artifact.
+
+    Args:
+        directory: Artifact directory
+        kind: Artifact type stored in the manifest (e.g. 'als_model')
+        arrays: dict of name -> numpy array; object arrays are not allowed
+        metadata: JSON-serializable dict (hyperparameters, counts, ...)
+
+    Returns:
+        The manifest dict
+    """
+    directory = os.path.abspath(directory)
+    tmp_directory = f"{directory}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_directory, ignore_errors=True)
+    os.makedirs(tmp_directory)
+
+    manifest = {
+        'format_version': ARTIFACT_FORMAT_VERSION,
+        'kind': kind,
+        'created_at': datetime.utcnow().isoformat(),
+        'arrays': {},
+        'metadata': metadata or {}
+    }
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        if array.dtype == object:
+            raise ValueError(f"Array '{name}' has dtype object; convert it to a fixed-width dtype")
+        filename = f"{name}.npy"
+        np.save(os.path.join(tmp_directory, filename), array, allow_pickle=False)
+        manifest['arrays'][name] = {
+            'file': filename,
+            'dtype': array.dtype.str,
+            'shape': list(array.shape)
+        }
+
+    with open(os.path.join(tmp_directory, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    # Swap in; processes that already mapped the old files keep reading them
+    old_directory = f"{directory}.old-{os.getpid()}"
+    if os.path.exists(directory):
+        os.rename(directory, old_directory)
+    os.rename(tmp_directory, directory)
+    shutil.rmtree(old_directory, ignore_errors=True)
+
+    return manifest
+
+
+def read_manifest(directory):
+    """Read an artifact manifest"""
+    with open(os.path.join(directory, MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+def load_artifact(directory, kind=None, mmap=True):
+    """
+    Load an artifact's arrays
+
+    Args:
+        directory: Artifact directory
+        kind: Expected manifest kind, checked when given
+        mmap: Map arrays read-only instead of reading them into memory
+
+    Returns:
+        (manifest dict, dict of name -> numpy array)
+    """
+    manifest = read_manifest(directory)
+    if manifest.get('format_version') != ARTIFACT_FORMAT_VERSION:
+        raise ValueError(f"Unsupported artifact format {manifest.get('format_version')} in {directory}")
+    if kind is not None and manifest.get('kind') != kind:
+        raise ValueError(f"Expected a '{kind}' artifact in {directory}, found '{manifest.get('kind')}'")
+
+    arrays = {}
+    for name, spec in manifest['arrays'].items():
+        # Empty arrays cannot be mapped
+        mapped = mmap and all(spec['shape'])
+        array = np.load(
+            os.path.join(directory, spec['file']),
+            mmap_mode='r' if mapped else None,
+            allow_pickle=False
+        )
+        if array.dtype.str != spec['dtype'] or list(array.shape) != spec['shape']:
+            raise ValueError(f"Array '{name}' in {directory} does not match its manifest")
+        arrays[name] = array
+
+    return manifest, arrays
+
+
+class ArtifactStore:
+    """
+    Process-wide holder of the object loaded from an artifact directory
+
+    The artifact is reloaded when its manifest changes, so a rebuilt artifact
+    is picked up without restarting the server.
+    """
+
+    def __init__(self, path, loader, check_interval=30, name='artifact'):
+        """
+        Args:
+            path: Artifact directory
+            loader: Function path -> loaded object (e.g. SimilarCoursesIndex.load)
+            check_interval: Seconds between manifest checks
+            name: Used in error messages
+        """
+        self.path = path
+        self.loader = loader
+        self.check_interval = check_interval
+        self.name = name
+        self._value = None
+        self._mtime = None
+        self._last_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the loaded object, or None if the artifact has not been built"""
+        now = time.time()
+        if now - self._last_check < self.check_interval:
+            return self._value
+
+        with self._lock:
+            self._last_check = now
+            try:
+                mtime = os.path.getmtime(os.path.join(self.path, MANIFEST_FILE))
+            except OSError:
+                # Not built yet, or being swapped by a rebuild right now
+                return self._value
+
+            if mtime != self._mtime:
+                try:
+                    self._value = self.loader(self.path)
+                    self._mtime = mtime
+                except Exception as e:
+                    print(f"[ERROR] Loading {self.name} failed: {e}")
+            return self._value
@@ -0,0 +1,100 @@
+"""
+Bounded LRU/TTL cache for per-user recommendation results
+Entries are keyed by user and the user's progress_version, which progress and
+preference writes bump, so a stale result is never looked up again.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from db import collections
+
+RECOMMENDATION_CACHE_SIZE = int(os.getenv('RECOMMENDATION_CACHE_SIZE', 10000))
+RECOMMENDATION_CACHE_TTL = int(os.getenv('RECOMMENDATION_CACHE_TTL', 300))
+
+# Ranked lists hold a score per candidate course, so fewer of them are kept
+RANKING_CACHE_SIZE = int(os.getenv('RANKING_CACHE_SIZE', 2000))
+
+
+class LRUCache:
+    """
+    Thread-safe LRU cache with per-entry expiry
+
+    Cached values are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, max_entries=RECOMMENDATION_CACHE_SIZE, ttl=RECOMMENDATION_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries if full"""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every entry (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """Return hit/miss/eviction counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+def bump_progress_version(email):
+    """
+    Invalidate cached recommendations for a user
+
+    Call after the progress write has been applied, so a reader that sees the
+    new version also sees the new progress.
+    """
+    if collections['users'] is not None:
+        collections['users'].update_one({'email': email}, {'$inc': {'progress_version': 1}})
+
+
+# Shared by every RecommenderService instance in this process
+recommendation_cache = LRUCache()
+
+# scoring.RankedList per user for paging beyond the first page, same keys
+ranking_cache = LRUCache(max_entries=RANKING_CACHE_SIZE)
@@ -0,0 +1,253 @@
+"""
+In-memory course catalog snapshot
+Loads courses, learning paths, course levels and the onboarding interest to
+learning path mapping once and shares them across all recommendation calls. The snapshot is refreshed when the catalog version in
+`catalog_meta` changes or when the TTL expires.
+"""
+import os
+import threading
+import time
+from types import MappingProxyType
+from db import collections
+
+CATALOG_TTL_SECONDS = int(os.getenv('CATALOG_TTL_SECONDS', 600))
+CATALOG_VERSION_CHECK_SECONDS = int(os.getenv('CATALOG_VERSION_CHECK_SECONDS', 30))
+
+# Fallback level ordering when course_levels is empty
+DEFAULT_LEVEL_ORDER = {'Dasar': 1, 'Pemula': 2, 'Menengah': 3, 'Mahir': 4, 'Profesional': 5}
+
+BEGINNER_LEVELS = ('Dasar', 'Pemula')
+ADVANCED_LEVELS = ('Menengah', 'Mahir', 'Profesional')
+
+# Used for interests that current_interest_questions does not map to a learning path
+DEFAULT_INTEREST_TO_LP = {
+    'Mobile Development': [2, 12, 10],  # Android, Multi-Platform, iOS
+    'Artificial Intelligence': [1, 8, 11],  # AI Engineer, Gen AI, MLOps
+    'Cloud Computing': [6, 9],  # DevOps, Google Cloud
+    'Web Development': [3, 4, 7, 13]  # Back-End JS, Back-End Python, Front-End, React
+}
+
+
+def read_catalog_version():
+    """Read the current catalog version from catalog_meta (0 if never bumped)"""
+    if collections['catalog_meta'] is None:
+        return 0
+    meta = collections['catalog_meta'].find_one({'_id': 'catalog'}, {'version': 1})
+    return meta.get('version', 0) if meta else 0
+
+
+def bump_catalog_version():
+    """Mark the catalog as changed so every process reloads its snapshot"""
+    if collections['catalog_meta'] is not None:
+        collections['catalog_meta'].update_one(
+            {'_id': 'catalog'},
+            {'$inc': {'version': 1}},
+            upsert=True
+        )
+
+
+def get_progress_generation():
+    """
+    Read the student_progress generation from catalog_meta (0 if never bumped)
+
+    Bumped whenever the collection is replaced wholesale, so incremental
+    consumers (the ML feature store) know to rebuild from a full export.
+    """
+    if collections['catalog_meta'] is None:
+        return 0
+    meta = collections['catalog_meta'].find_one({'_id': 'student_progress'}, {'generation': 1})
+    return meta.get('generation', 0) if meta else 0
+
+
+def bump_progress_generation():
+    """Mark student_progress as replaced (see get_progress_generation)"""
+    if collections['catalog_meta'] is not None:
+        collections['catalog_meta'].update_one(
+            {'_id': 'student_progress'},
+            {'$inc': {'generation': 1}},
+            upsert=True
+        )
+
+
+def load_interest_to_lp(learning_paths):
+    """
+    Build the onboarding interest -> learning path ids mapping from the database
+
+    Each current_interest_questions option belongs to an interest `category` and
+    names a learning path in `option_text` (or carries `learning_path_id`
+    directly). Names are resolved through learning_path_answers (id, name) and
+    the learning_paths collection. Interests without any resolvable option keep
+    their DEFAULT_INTEREST_TO_LP entry.
+
+    Args:
+        learning_paths: learning_paths documents already loaded for the snapshot
+
+    Returns:
+        dict of interest -> list of learning path ids
+    """
+    interest_to_lp = {interest: list(lp_ids) for interest, lp_ids in DEFAULT_INTEREST_TO_LP.items()}
+    if collections['current_interest_questions'] is None:
+        return interest_to_lp
+
+    lp_ids_by_name = {}
+    for lp in learning_paths:
+        name = lp.get('learning_path_name')
+        if isinstance(name, str) and lp.get('learning_path_id') is not None:
+            lp_ids_by_name.setdefault(name.strip().lower(), lp.get('learning_path_id'))
+    if collections['learning_path_answers'] is not None:
+        for answer in collections['learning_path_answers'].find({}, {'_id': 0, 'id': 1, 'name': 1}):
+            name = answer.get('name')
+            if isinstance(name, str) and answer.get('id') is not None:
+                lp_ids_by_name.setdefault(name.strip().lower(), answer.get('id'))
+
+    loaded = {}
+    for option in collections['current_interest_questions'].find(
+        {},
+        {'_id': 0, 'category': 1, 'option_text': 1, 'learning_path_id': 1}
+    ):
+        category = option.get('category')
+        lp_id = option.get('learning_path_id')
+        if lp_id is None and isinstance(option.get('option_text'), str):
+            lp_id = lp_ids_by_name.get(option['option_text'].strip().lower())
+        if not category or lp_id is None:
+            continue
+        lp_ids = loaded.setdefault(category, [])
+        if lp_id not in lp_ids:
+            lp_ids.append(lp_id)
+
+    interest_to_lp.update(loaded)
+    return interest_to_lp
+
+
+class CatalogSnapshot:
+    """
+    Read-only view of the course catalog
+
+    Courses are stored as read-only mappings in collection order so that
+    scoring stays deterministic. Never mutate a snapshot; load a new one instead.
+    """
+
+    def __init__(self, version, courses, learning_paths, levels, interest_to_lp=None):
+        self.version = version
+        self.loaded_at = time.time()
+        self.courses = tuple(MappingProxyType(course) for course in courses)
+
+        courses_by_id = {}
+        for course in self.courses:
+            courses_by_id.setdefault(course.get('course_id'), course)
+        self.courses_by_id = MappingProxyType(courses_by_id)
+
+        # learning_paths holds one document per LP/course row, keep the first name per id
+        lp_names = {}
+        for lp in learning_paths:
+            lp_id = lp.get('learning_path_id')
+            if lp_id is not None and lp_id not in lp_names:
+                lp_names[lp_id] = lp.get('learning_path_name')
+        self.learning_paths = MappingProxyType(lp_names)
+
+        self.levels = tuple(MappingProxyType(level) for level in levels)
+        level_order = {
+            level.get('course_level'): level.get('id')
+            for level in levels
+            if level.get('course_level') and level.get('id') is not None
+        }
+        self.level_order = MappingProxyType(level_order or dict(DEFAULT_LEVEL_ORDER))
+
+        self.interest_to_lp = MappingProxyType({
+            interest: tuple(lp_ids)
+            for interest, lp_ids in (interest_to_lp or DEFAULT_INTEREST_TO_LP).items()
+        })
+
+    @classmethod
+    def load(cls, version=None):
+        """Load a fresh snapshot from MongoDB"""
+        if version is None:
+            version = read_catalog_version()
+
+        courses = []
+        if collections['courses'] is not None:
+            courses = list(collections['courses'].find({}, {'_id': 0}))
+
+        learning_paths = []
+        if collections['learning_paths'] is not None:
+            learning_paths = list(collections['learning_paths'].find(
+                {},
+                {'_id': 0, 'learning_path_id': 1, 'learning_path_name': 1}
+            ))
+
+        levels = []
+        if collections['course_levels'] is not None:
+            levels = list(collections['course_levels'].find({}, {'_id': 0}))
+
+        interest_to_lp = load_interest_to_lp(learning_paths)
+
+        return cls(version, courses, learning_paths, levels, interest_to_lp)
+
+
+class CatalogStore:
+    """
+    Process-wide holder of the current CatalogSnapshot
+
+    Readers always get a complete snapshot. While one thread reloads, other
+    threads keep serving the previous snapshot instead of waiting.
+    """
+
+    def __init__(self, ttl=CATALOG_TTL_SECONDS, version_check_interval=CATALOG_VERSION_CHECK_SECONDS):
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self._snapshot = None
+        self._last_version_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Return the current snapshot, reloading it if stale"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return self.refresh()
+
+        now = time.time()
+        if now - snapshot.loaded_at >= self.ttl:
+            return self._refresh_stale(snapshot)
+
+        if now - self._last_version_check >= self.version_check_interval:
+            self._last_version_check = now
+            try:
+                if read_catalog_version() != snapshot.version:
+                    return self._refresh_stale(snapshot)
+            except Exception as e:
+                print(f"[ERROR] Catalog version check failed: {e}")
+
+        return snapshot
+
+    def refresh(self):
+        """Load a new snapshot and swap it in"""
+        with self._lock:
+            return self._load()
+
+    def invalidate(self):
+        """Drop the current snapshot so the next get() reloads it"""
+        self._snapshot = None
+
+    def _refresh_stale(self, stale):
+        """Reload a stale snapshot; keep serving it if another thread is reloading or the load fails"""
+        if not self._lock.acquire(blocking=False):
+            return stale
+        try:
+            if self._snapshot is not None and self._snapshot is not stale:
+                return self._snapshot
+            return self._load()
+        except Exception as e:
+            print(f"[ERROR] Catalog reload failed, serving previous snapshot: {e}")
+            return stale
+        finally:
+            self._lock.release()
+
+    def _load(self):
+        snapshot = CatalogSnapshot.load()
+        self._snapshot = snapshot
+        self._last_version_check = time.time()
+        return snapshot
+
+
+# Shared by every RecommenderService instance in this process
+catalog_store = CatalogStore()
@@ -0,0 +1,50 @@
+"""
+Precomputed onboarding recommendation tables
+The onboarding result only depends on the primary interest, so the ranked
+course list for every interest is built once per catalog snapshot.
+"""
+
+# Learning path(s) used when the primary interest is unknown (Front-End)
+DEFAULT_ONBOARDING_LPS = (7,)
+ONBOARDING_COURSE_LIMIT = 6
+
+
+class OnboardingTables:
+    """Ranked onboarding courses per interest for one CatalogSnapshot"""
+
+    def __init__(self, catalog):
+        """
+        Build one table per entry of catalog.interest_to_lp plus the default
+
+        Args:
+            catalog: CatalogSnapshot the tables are derived from
+        """
+        self.catalog = catalog
+
+        # Dasar/Pemula first; unknown levels rank like Menengah
+        level_order = catalog.level_order
+        default_rank = level_order.get('Menengah', 3)
+
+        self._tables = {}
+        for lp_ids in set(catalog.interest_to_lp.values()) | {DEFAULT_ONBOARDING_LPS}:
+            wanted = set(lp_ids)
+            courses = [course for course in catalog.courses if course.get('learning_path_id') in wanted]
+            courses.sort(key=lambda x: level_order.get(x.get('course_level_str', 'Menengah'), default_rank))
+            self._tables[lp_ids] = [
+                {
+                    'course_id': c.get('course_id'),
+                    'course_name': c.get('course_name'),
+                    'learning_path_id': c.get('learning_path_id'),
+                    'level': c.get('course_level_str'),
+                    'hours': c.get('hours_to_study')
+                }
+                for c in courses[:ONBOARDING_COURSE_LIMIT]
+            ]
+
+    def learning_paths_for(self, interest):
+        """Return the learning path ids recommended for an interest"""
+        return self.catalog.interest_to_lp.get(interest, DEFAULT_ONBOARDING_LPS)
+
+    def courses_for(self, interest):
+        """Return the precomputed ranked course list for an interest (read-only)"""
+        return self._tables[self.learning_paths_for(interest)]
@@ -2,22 +2,210 @@
 Recommender service for personalized course recommendations
 Uses rule-based approach with skill keywords and student progress
 """
+import hashlib
+import os
+import threading
+from types import MappingProxyType
+import numpy as np
 from db import collections
 from collections import Counter
+from services.catalog import catalog_store
+from services.cache import recommendation_cache, ranking_cache
+from services.skill_matcher import SkillMatcher
+from services.skill_index import CourseSkillIndex
+from services.scoring import VectorScorer, RankedList, top_k, render_reason
+from services.onboarding import OnboardingTables
+from services.skill_profile import SkillProfileStore, completion_ratio
+
+# Users loaded and scored together by iter_user_recommendations
+BATCH_CHUNK_SIZE = 500
+
+# Courses per page of recommendations; the first page is what gets cached and materialized
+DEFAULT_PAGE_SIZE = 10
+
+# Serve precomputed results from the recommendations collection when they are current
+USE_MATERIALIZED_RECOMMENDATIONS = os.getenv('USE_MATERIALIZED_RECOMMENDATIONS', 'true').lower() == 'true'
+
+def load_skill_keywords():
+    """Load skill keywords from database as a dict of keyword id -> lowercase keyword"""
+    skill_keywords = {}
+    if collections['skill_keywords'] is not None:
+        keywords = list(collections['skill_keywords'].find({}))
+        for kw in keywords:
+            keyword_id = str(kw.get('id', ''))
+            keyword_text = kw.get('keyword', '').lower()
+            skill_keywords[keyword_id] = keyword_text
+    return skill_keywords
+
+
+class RecommenderState:
+    """
+    Skill keywords, catalog snapshot and everything derived from them
+    
+    A state is never modified after it is built. Reloads build a new state
+    and swap the reference, so a request keeps using the keywords, catalog
+    and scorer it started with.
+    """
+    
+    def __init__(self, skill_keywords, catalog):
+        self.skill_keywords = MappingProxyType(dict(skill_keywords))
+        
+        # Compile all keywords into one automaton
+        self.skill_matcher = SkillMatcher(self.skill_keywords.values())
+        self.keywords_version = hashlib.sha1(
+            '\n'.join(self.skill_keywords.values()).encode('utf-8')
+        ).hexdigest()[:12]
+        
+        self.catalog = catalog
+        self.scorer = VectorScorer(CourseSkillIndex(catalog, self.skill_matcher))
+        self.onboarding_tables = OnboardingTables(catalog)
+    
+    @classmethod
+    def load(cls, catalog):
+        """Load the skill keywords and build a state for this catalog snapshot"""
+        return cls(load_skill_keywords(), catalog)
+
 
 class RecommenderService:
     def __init__(self):
-        self.skill_keywords = {}
-        self.load_skill_keywords()
-    
-    def load_skill_keywords(self):
-        """Load skill keywords from database"""
-        if collections['skill_keywords'] is not None:
-            keywords = list(collections['skill_keywords'].find({}))
-            for kw in keywords:
-                keyword_id = str(kw.get('id', ''))
-                keyword_text = kw.get('keyword', '').lower()
-                self.skill_keywords[keyword_id] = keyword_text
+        self._state = None
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self.skill_profiles = SkillProfileStore(self)
+    
+    @property
+    def state(self):
+        """
+        Current RecommenderState
+        
+        Loaded on first use. When the catalog snapshot changes (catalog version
+        bump or TTL) keywords and catalog are reloaded together in a background
+        thread while the previous state keeps being served.
+        """
+        state = self._state
+        if state is None:
+            with self._lock:
+                if self._state is None:
+                    self._state = RecommenderState.load(catalog_store.get())
+                return self._state
+        
+        catalog = catalog_store.get()
+        if catalog is not state.catalog:
+            self._refresh_in_background(catalog)
+        return state
+    
+    @property
+    def skill_keywords(self):
+        return self.state.skill_keywords
+    
+    @property
+    def keywords_version(self):
+        return self.state.keywords_version
+    
+    def reload(self):
+        """
+        Reload skill keywords and the catalog now and swap them in atomically
+        
+        Requests already running finish with the state they started with.
+        
+        Returns:
+            The new RecommenderState
+        """
+        state = RecommenderState.load(catalog_store.refresh())
+        with self._lock:
+            self._state = state
+        return state
+    
+    def warm_up(self):
+        """Load keywords, catalog and scorer in a background thread so the first request does not pay for it"""
+        thread = threading.Thread(target=self._warm_up, name='recommender-warm-up', daemon=True)
+        thread.start()
+        return thread
+    
+    def _warm_up(self):
+        try:
+            self.state
+        except Exception as e:
+            print(f"[ERROR] Recommender warm-up failed: {e}")
+    
+    def _refresh_in_background(self, catalog):
+        """Build a state for a newer catalog snapshot unless a refresh is already running"""
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        
+        def refresh():
+            try:
+                state = RecommenderState.load(catalog)
+                with self._lock:
+                    # A newer state may have been installed by reload() meanwhile
+                    if self._state.catalog.loaded_at <= catalog.loaded_at:
+                        self._state = state
+            except Exception as e:
+                print(f"[ERROR] Recommender reload failed, serving previous state: {e}")
+            finally:
+                self._refreshing = False
+        
+        threading.Thread(target=refresh, name='recommender-refresh', daemon=True).start()
+    
+    def get_user_recommendations(self, user, user_progress=None, limit=DEFAULT_PAGE_SIZE, cursor=0):
+        """
+        Get recommendations for a user document, served from cache when possible
+        
+        The cache key includes the user's progress_version, which is bumped by
+        progress and preference updates. The first page is cached as a finished
+        response; other pages are cut from the user's cached RankedList.
+        
+        Args:
+            user: User document from the users collection
+            user_progress: Progress documents if the caller already loaded them
+            limit: Number of courses per page
+            cursor: Offset of the page, as returned in next_cursor
+        
+        Returns:
+            dict with recommended courses and learning paths (shared, read-only)
+        """
+        email = user.get('email')
+        state = self.state
+        cache_key = self._cache_key(user, state)
+        first_page = cursor == 0 and limit == DEFAULT_PAGE_SIZE
+        
+        if first_page:
+            cached = recommendation_cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # Precomputed by scripts/materialize_recommendations.py
+            materialized = self._get_materialized(user, state)
+            if materialized is not None:
+                recommendation_cache.set(cache_key, materialized)
+                return materialized
+        
+        ranking = ranking_cache.get(cache_key)
+        if ranking is None:
+            # Skills come from the stored profile instead of the full progress history
+            completed_skills, weak_skills = self.skill_profiles.get(state, email, user_progress)
+            ranking = RankedList(state.scorer, completed_skills, weak_skills, user.get('preferences', {}))
+            ranking_cache.set(cache_key, ranking)
+        
+        recommendations = self._format_page(state, ranking, cursor, limit)
+        if first_page:
+            recommendation_cache.set(cache_key, recommendations)
+        return recommendations
+    
+    def get_skill_profile(self, user_email, user_progress=None):
+        """
+        Get the user's completed and weak skills from the stored skill profile
+        
+        Returns:
+            (completed_skills, weak_skills) dicts of skill -> course count
+        """
+        return self.skill_profiles.get(self.state, user_email, user_progress)
+    
+    def update_skill_profile(self, user_email, old_progress, new_progress):
+        """Apply a single progress row change to the stored skill profile"""
+        self.skill_profiles.apply_update(self.state, user_email, old_progress, new_progress)
     
     def get_recommendations(self, user_email, user_progress, user_preferences):
         """
@@ -31,56 +219,162 @@ class RecommenderService:
         Returns:
             dict with recommended courses and learning paths
         """
+        state = self.state
+        
         # Analyze user's current skills
-        completed_skills = self._extract_completed_skills(user_progress)
-        weak_skills = self._identify_weak_skills(user_progress)
-        
-        # Get all courses
-        all_courses = []
-        if collections['courses'] is not None:
-            all_courses = list(collections['courses'].find({}, {'_id': 0}))
-        
-        # Score courses based on user needs
-        scored_courses = []
-        for course in all_courses:
-            score = self._calculate_course_score(
-                course, 
-                completed_skills, 
+        completed_skills = self._extract_completed_skills(user_progress, state)
+        weak_skills = self._identify_weak_skills(user_progress, state)
+        
+        return self._recommend(state, completed_skills, weak_skills, user_preferences)
+    
+    def _recommend(self, state, completed_skills, weak_skills, user_preferences):
+        """Score and format the first page of recommendations for one user's skills"""
+        ranking = RankedList(state.scorer, completed_skills, weak_skills, user_preferences)
+        return self._format_page(state, ranking, 0, DEFAULT_PAGE_SIZE)
+    
+    def _format_page(self, state, ranking, cursor, limit):
+        """Format one page of a RankedList"""
+        ranked, next_cursor = ranking.page(cursor, limit)
+        return self._format_recommendations(
+            state.catalog,
+            state.scorer,
+            ranked,
+            ranking.completed_skills,
+            ranking.weak_skills,
+            next_cursor
+        )
+    
+    def _recommend_batch(self, state, skills):
+        """Score and format recommendations for many (completed_skills, weak_skills, preferences) tuples"""
+        catalog = state.catalog
+        scorer = state.scorer
+        score_matrix = scorer.score_batch(skills)
+        
+        all_positions = np.arange(len(catalog.courses))
+        results = []
+        for row, (completed_skills, weak_skills, _) in enumerate(skills):
+            # One extra course tells whether there is a next page
+            ranked = top_k(all_positions, score_matrix[row], DEFAULT_PAGE_SIZE + 1)
+            results.append(self._format_recommendations(
+                catalog,
+                scorer,
+                ranked[:DEFAULT_PAGE_SIZE],
+                completed_skills,
                 weak_skills,
-                user_preferences
-            )
-            if score > 0:
-                scored_courses.append({
-                    'course': course,
-                    'score': score,
-                    'reason': self._get_recommendation_reason(course, completed_skills, weak_skills)
-                })
-        
-        # Sort by score and get top recommendations
-        scored_courses.sort(key=lambda x: x['score'], reverse=True)
-        top_recommendations = scored_courses[:10]
+                DEFAULT_PAGE_SIZE if len(ranked) > DEFAULT_PAGE_SIZE else None
+            ))
+        return results
+    
+    def iter_user_recommendations(self, field, values, chunk_size=BATCH_CHUNK_SIZE):
+        """
+        Yield recommendations for many users
+        
+        Each chunk loads its users and their progress with one $in query each,
+        serves cached results and scores the rest in one matrix product.
+        
+        Args:
+            field: User field the values refer to ('email' or '_id')
+            values: List of emails or ObjectIds
+            chunk_size: Number of users handled per round trip
+        
+        Yields:
+            (value, user, recommendations) tuples in input order;
+            user and recommendations are None when the user does not exist
+        """
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            state = self.state
+            
+            users_by_key = {}
+            if collections['users'] is not None:
+                for user in collections['users'].find({field: {'$in': chunk}}):
+                    users_by_key[user.get(field)] = user
+            
+            # Serve what we can from cache
+            results = {}
+            pending = []
+            for user in users_by_key.values():
+                cached = recommendation_cache.get(self._cache_key(user, state))
+                if cached is not None:
+                    results[user.get(field)] = cached
+                else:
+                    pending.append(user)
+            
+            if pending:
+                profiles = self.skill_profiles.get_many(state, [user.get('email') for user in pending])
+                computed = self._recommend_batch(state, [
+                    profiles[user.get('email')] + (user.get('preferences', {}),)
+                    for user in pending
+                ])
+                for user, recommendations in zip(pending, computed):
+                    recommendation_cache.set(self._cache_key(user, state), recommendations)
+                    results[user.get(field)] = recommendations
+            
+            for value in chunk:
+                yield value, users_by_key.get(value), results.get(value)
+    
+    def materialization_stamp(self, user, state, engine='rule'):
+        """
+        Engine and versions a materialized result was computed from; it is
+        served only while all still match (this service serves 'rule')
+        """
+        return {
+            'engine': engine,
+            'progress_version': user.get('progress_version', 0),
+            'catalog_version': state.catalog.version,
+            'keywords_version': state.keywords_version
+        }
+    
+    def _get_materialized(self, user, state):
+        """Return the materialized recommendations for user if they are still current"""
+        if not USE_MATERIALIZED_RECOMMENDATIONS or collections['recommendations'] is None:
+            return None
+        
+        stamp = self.materialization_stamp(user, state)
+        doc = collections['recommendations'].find_one({'email': user.get('email'), 'engine': stamp['engine']},
+                                                      {'_id': 0})
+        if not doc:
+            return None
+        
+        if any(doc.get(field) != value for field, value in stamp.items()):
+            return None
+        return doc.get('data')
+    
+    def _cache_key(self, user, state):
+        """Cache key that changes with the user's progress/preferences, the catalog and keywords"""
+        return (user.get('email'), user.get('progress_version', 0), state.catalog.version, state.keywords_version)
+    
+    def _format_recommendations(self, catalog, scorer, ranked, completed_skills, weak_skills, next_cursor=None):
+        """Build the recommendation response from (position, score) pairs"""
+        # Reasons are only derived and rendered for the returned courses
+        reasons = scorer.explain([position for position, _ in ranked], completed_skills, weak_skills)
+        
+        recommended_courses = []
+        for (position, score), (reason_code, reason_skill) in zip(ranked, reasons):
+            course = catalog.courses[position]
+            recommended_courses.append({
+                'course_id': course.get('course_id'),
+                'course_name': course.get('course_name'),
+                'learning_path_id': course.get('learning_path_id'),
+                'level': course.get('course_level_str'),
+                'hours': course.get('hours_to_study'),
+                'score': score,
+                'reason': render_reason(reason_code, reason_skill),
+                'reason_code': reason_code,
+                'reason_skill': reason_skill
+            })
         
         # Get learning paths
-        recommended_lps = self._get_recommended_learning_paths(top_recommendations)
+        recommended_lps = self._get_recommended_learning_paths(recommended_courses, catalog)
         
         return {
-            'recommended_courses': [
-                {
-                    'course_id': rec['course'].get('course_id'),
-                    'course_name': rec['course'].get('course_name'),
-                    'learning_path_id': rec['course'].get('learning_path_id'),
-                    'level': rec['course'].get('course_level_str'),
-                    'hours': rec['course'].get('hours_to_study'),
-                    'score': rec['score'],
-                    'reason': rec['reason']
-                }
-                for rec in top_recommendations
-            ],
+            'recommended_courses': recommended_courses,
             'recommended_learning_paths': recommended_lps,
             'skill_analysis': {
                 'completed_skills': list(completed_skills.keys())[:10],
                 'weak_areas': list(weak_skills.keys())[:5]
-            }
+            },
+            'next_cursor': next_cursor
         }
     
     def get_onboarding_recommendations(self, interest_answers, tech_answers):
@@ -94,156 +388,87 @@ class RecommenderService:
         Returns:
             dict with recommended learning paths and courses
         """
-        # Map interest answers to learning paths
-        interest_to_lp = {
-            'Mobile Development': [2, 12, 10],  # Android, Multi-Platform, iOS
-            'Artificial Intelligence': [1, 8, 11],  # AI Engineer, Gen AI, MLOps
-            'Cloud Computing': [6, 9],  # DevOps, Google Cloud
-            'Web Development': [3, 4, 7, 13]  # Back-End JS, Back-End Python, Front-End, React
-        }
+        # Interest -> learning path mapping and ranked courses are precomputed per catalog snapshot
+        tables = self.state.onboarding_tables
         
         # Determine primary interest
         interest_counts = Counter(interest_answers)
         primary_interest = interest_counts.most_common(1)[0][0] if interest_counts else 'Web Development'
         
-        # Get recommended learning paths
-        recommended_lp_ids = interest_to_lp.get(primary_interest, [7])  # Default to Front-End
-        
-        # Get courses for recommended learning paths
-        recommended_courses = []
-        if collections['courses'] is not None:
-            courses = list(collections['courses'].find(
-                {'learning_path_id': {'$in': recommended_lp_ids}},
-                {'_id': 0}
-            ))
-            # Sort by level (Dasar/Pemula first)
-            level_order = {'Dasar': 1, 'Pemula': 2, 'Menengah': 3, 'Mahir': 4, 'Profesional': 5}
-            courses.sort(key=lambda x: level_order.get(x.get('course_level_str', 'Menengah'), 3))
-            recommended_courses = courses[:6]
-        
         return {
             'primary_interest': primary_interest,
-            'recommended_learning_paths': recommended_lp_ids,
-            'recommended_courses': [
-                {
-                    'course_id': c.get('course_id'),
-                    'course_name': c.get('course_name'),
-                    'learning_path_id': c.get('learning_path_id'),
-                    'level': c.get('course_level_str'),
-                    'hours': c.get('hours_to_study')
-                }
-                for c in recommended_courses
-            ],
+            'recommended_learning_paths': list(tables.learning_paths_for(primary_interest)),
+            'recommended_courses': list(tables.courses_for(primary_interest)),
             'onboarding_complete': True
         }
     
-    def _extract_completed_skills(self, user_progress):
+    def _extract_completed_skills(self, user_progress, state=None):
         """Extract skills from completed courses"""
+        skill_matcher = (state or self.state).skill_matcher
         completed_skills = {}
         
         for progress in user_progress:
             if progress.get('is_graduated', 0) == 1:
                 course_name = progress.get('course_name', '')
                 # Extract keywords from course name
-                course_lower = course_name.lower()
-                for skill_id, skill_keyword in self.skill_keywords.items():
-                    if skill_keyword in course_lower:
-                        completed_skills[skill_keyword] = completed_skills.get(skill_keyword, 0) + 1
+                for skill_keyword in skill_matcher.match(course_name):
+                    completed_skills[skill_keyword] = (completed_skills.get(skill_keyword, 0) +
+                                                       skill_matcher.multiplicity[skill_keyword])
         
         return completed_skills
     
-    def _identify_weak_skills(self, user_progress):
+    def _identify_weak_skills(self, user_progress, state=None):
         """Identify areas where user needs improvement"""
+        skill_matcher = (state or self.state).skill_matcher
         weak_skills = {}
         
         for progress in user_progress:
             if progress.get('is_graduated', 0) == 0:
                 # Course not completed
                 course_name = progress.get('course_name', '')
-                completion_rate = (progress.get('completed_tutorials', 0) / 
-                                 max(progress.get('active_tutorials', 1), 1))
+                completion_rate = completion_ratio(progress)
                 
                 if completion_rate < 0.5:  # Less than 50% complete
-                    course_lower = course_name.lower()
-                    for skill_id, skill_keyword in self.skill_keywords.items():
-                        if skill_keyword in course_lower:
-                            weak_skills[skill_keyword] = weak_skills.get(skill_keyword, 0) + 1
+                    for skill_keyword in skill_matcher.match(course_name):
+                        weak_skills[skill_keyword] = (weak_skills.get(skill_keyword, 0) +
+                                                      skill_matcher.multiplicity[skill_keyword])
         
         return weak_skills
     
-    def _calculate_course_score(self, course, completed_skills, weak_skills, preferences):
-        """Calculate recommendation score for a course"""
-        score = 0
-        course_name = course.get('course_name', '').lower()
-        course_level = course.get('course_level_str', '')
-        
-        # Check if course addresses weak skills
-        for skill in weak_skills.keys():
-            if skill in course_name:
-                score += 10 * weak_skills[skill]
-        
-        # Prefer courses that build on completed skills
-        for skill in completed_skills.keys():
-            if skill in course_name:
-                # Prefer intermediate/advanced courses for completed skills
-                if course_level in ['Menengah', 'Mahir', 'Profesional']:
-                    score += 5
-        
-        # Prefer beginner courses if user has no progress
-        if not completed_skills and course_level in ['Dasar', 'Pemula']:
-            score += 15
-        
-        # Apply preferences
-        preferred_lp = preferences.get('preferred_learning_path_id')
-        if preferred_lp and course.get('learning_path_id') == preferred_lp:
-            score += 10
-        
-        return score
-    
-    def _get_recommendation_reason(self, course, completed_skills, weak_skills):
-        """Generate human-readable reason for recommendation"""
-        course_name = course.get('course_name', '')
-        course_lower = course_name.lower()
-        
-        reasons = []
-        
-        # Check weak skills
-        for skill in weak_skills.keys():
-            if skill in course_lower:
-                reasons.append(f"Mengatasi kelemahan di bidang {skill}")
-        
-        # Check skill progression
-        for skill in completed_skills.keys():
-            if skill in course_lower:
-                reasons.append(f"Mengembangkan skill {skill} ke level lebih tinggi")
-        
-        if not reasons:
-            reasons.append("Kursus yang sesuai dengan level Anda")
-        
-        return reasons[0] if reasons else "Rekomendasi berdasarkan profil Anda"
-    
-    def _get_recommended_learning_paths(self, top_courses):
+    def _get_recommended_learning_paths(self, top_courses, catalog):
         """Get learning paths from top recommended courses"""
         lp_ids = set()
         for rec in top_courses:
-            lp_id = rec['course'].get('learning_path_id')
+            lp_id = rec.get('learning_path_id')
             if lp_id:
                 lp_ids.add(lp_id)
         
-        # Get learning path details
-        recommended_lps = []
-        if collections['learning_paths'] is not None:
-            lps = list(collections['learning_paths'].find(
-                {'learning_path_id': {'$in': list(lp_ids)}},
-                {'_id': 0}
-            ))
-            recommended_lps = [
-                {
-                    'learning_path_id': lp.get('learning_path_id'),
-                    'learning_path_name': lp.get('learning_path_name')
-                }
-                for lp in lps
-            ]
-        
-        return recommended_lps
+        # Learning path names come from the catalog snapshot
+        return [
+            {
+                'learning_path_id': lp_id,
+                'learning_path_name': lp_name
+            }
+            for lp_id, lp_name in catalog.learning_paths.items()
+            if lp_id in lp_ids
+        ]
+
+
 
+_shared_recommender = None
+_shared_lock = threading.Lock()
+
+
+def get_recommender():
+    """
+    Return the RecommenderService shared by every route in this process
+    
+    Creating it does not touch the database; keywords and catalog are loaded
+    on first use or by warm_up().
+    """
+    global _shared_recommender
+    if _shared_recommender is None:
+        with _shared_lock:
+            if _shared_recommender is None:
+                _shared_recommender = RecommenderService()
+    return _shared_recommender
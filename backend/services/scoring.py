@@ -0,0 +1,315 @@
+"""
+Vectorized rule-based course scoring
+Expresses the RecommenderService scoring rules as matrix operations over a
+course x skill incidence matrix so one user (or a whole batch) is scored with a
+single matrix product.
+"""
+import numpy as np
+from services.catalog import ADVANCED_LEVELS
+
+WEAK_SKILL_WEIGHT = 10
+COMPLETED_SKILL_WEIGHT = 5
+BEGINNER_BONUS = 15
+PREFERRED_LP_BONUS = 10
+
+# Learning path codes for courses without a learning path and users without a preference
+_NO_LP = -1
+_NO_PREFERENCE = -2
+
+# Structured recommendation reasons, rendered to text by render_reason
+REASON_WEAK_SKILL = 'weak_skill'
+REASON_SKILL_PROGRESSION = 'skill_progression'
+REASON_LEVEL_MATCH = 'level_match'
+REASON_SIMILAR_LEARNERS = 'similar_learners'
+REASON_SIMILAR_COURSE = 'similar_course'
+
+REASON_TEMPLATES = {
+    REASON_WEAK_SKILL: "Mengatasi kelemahan di bidang {skill}",
+    REASON_SKILL_PROGRESSION: "Mengembangkan skill {skill} ke level lebih tinggi",
+    REASON_LEVEL_MATCH: "Kursus yang sesuai dengan level Anda",
+    REASON_SIMILAR_LEARNERS: "Banyak diambil siswa dengan progres belajar serupa",
+    REASON_SIMILAR_COURSE: "Sering diambil bersama kursus yang sudah Anda ikuti"
+}
+
+
+def render_reason(code, skill=None):
+    """Render a structured reason as the human-readable text shown to users"""
+    return REASON_TEMPLATES[code].format(skill=skill)
+
+
+class VectorScorer:
+    """
+    Scores every course of a CourseSkillIndex for one or many users
+
+    Score per course (the rule-based scoring rules):
+        10 * sum(weak count of each course skill)
+      + 5 * (number of completed course skills), advanced courses only
+      + 15 for beginner courses when the user has no completed skills
+      + 10 when the course is in the preferred learning path
+    """
+
+    def __init__(self, index):
+        """
+        Build the incidence matrix and level / learning path vectors
+
+        Args:
+            index: CourseSkillIndex the scorer is derived from
+        """
+        self.index = index
+        self.skills = index.skill_matcher.keywords
+        self.skill_positions = {skill: i for i, skill in enumerate(self.skills)}
+
+        n_courses = len(index.course_skills)
+        self.incidence = np.zeros((n_courses, len(self.skills)), dtype=np.float64)
+        for position, skills in enumerate(index.course_skills):
+            for skill in skills:
+                self.incidence[position, self.skill_positions[skill]] = 1.0
+
+        self.advanced = np.array(
+            [course.get('course_level_str', '') in ADVANCED_LEVELS for course in index.catalog.courses],
+            dtype=bool
+        )
+        self.beginner = np.zeros(n_courses, dtype=bool)
+        self.beginner[list(index.beginner_courses)] = True
+
+        self.lp_codes = {lp_id: code for code, lp_id in enumerate(index.lp_courses)}
+        self.course_lp = np.full(n_courses, _NO_LP, dtype=np.int64)
+        for lp_id, positions in index.lp_courses.items():
+            self.course_lp[list(positions)] = self.lp_codes[lp_id]
+
+    def user_vectors(self, completed_skills, weak_skills):
+        """
+        Turn skill dicts into dense skill vectors
+
+        Returns:
+            (weak_counts, completed_indicator) arrays of length n_skills
+        """
+        weak = np.zeros(len(self.skills), dtype=np.float64)
+        for skill, count in weak_skills.items():
+            position = self.skill_positions.get(skill)
+            if position is not None:
+                weak[position] = count
+
+        completed = np.zeros(len(self.skills), dtype=np.float64)
+        for skill in completed_skills:
+            position = self.skill_positions.get(skill)
+            if position is not None:
+                completed[position] = 1.0
+
+        return weak, completed
+
+    def preferred_lp_code(self, preferences):
+        """Map a user's preferred learning path to its course_lp code"""
+        preferred_lp = preferences.get('preferred_learning_path_id')
+        if not preferred_lp:
+            return _NO_PREFERENCE
+        try:
+            return self.lp_codes.get(preferred_lp, _NO_PREFERENCE)
+        except TypeError:
+            return _NO_PREFERENCE
+
+    def score(self, completed_skills, weak_skills, preferences, positions=None):
+        """
+        Score courses for one user
+
+        Args:
+            completed_skills: dict of completed skill -> count
+            weak_skills: dict of weak skill -> count
+            preferences: User preferences dict
+            positions: Optional sorted array of course positions to score
+
+        Returns:
+            (positions, scores) arrays
+        """
+        if positions is None:
+            positions = np.arange(len(self.advanced))
+        else:
+            positions = np.asarray(positions, dtype=np.int64)
+
+        weak, completed = self.user_vectors(completed_skills, weak_skills)
+        incidence = self.incidence[positions]
+
+        scores = WEAK_SKILL_WEIGHT * (incidence @ weak)
+        scores += COMPLETED_SKILL_WEIGHT * (incidence @ completed) * self.advanced[positions]
+        if not completed_skills:
+            scores += BEGINNER_BONUS * self.beginner[positions]
+        scores += PREFERRED_LP_BONUS * (self.course_lp[positions] == self.preferred_lp_code(preferences))
+
+        return positions, scores
+
+    def score_batch(self, users):
+        """
+        Score every course for many users with one matrix product
+
+        Args:
+            users: List of (completed_skills, weak_skills, preferences) tuples
+
+        Returns:
+            scores matrix of shape (n_users, n_courses)
+        """
+        n_users = len(users)
+        weak = np.zeros((n_users, len(self.skills)), dtype=np.float64)
+        completed = np.zeros((n_users, len(self.skills)), dtype=np.float64)
+        no_completed = np.zeros(n_users, dtype=bool)
+        preferred = np.empty(n_users, dtype=np.int64)
+
+        for row, (completed_skills, weak_skills, preferences) in enumerate(users):
+            weak[row], completed[row] = self.user_vectors(completed_skills, weak_skills)
+            no_completed[row] = not completed_skills
+            preferred[row] = self.preferred_lp_code(preferences)
+
+        return self.score_vectors(weak, completed, no_completed, preferred)
+
+    def score_vectors(self, weak, completed, no_completed, preferred):
+        """
+        Score every course for users given as skill matrices
+
+        Args:
+            weak: (n_users, n_skills) weak skill counts, columns in self.skills order
+            completed: (n_users, n_skills) 1.0 where the skill is completed
+            no_completed: (n_users,) bool, user has no completed skills
+            preferred: (n_users,) preferred_lp_code of each user
+
+        Returns:
+            scores matrix of shape (n_users, n_courses)
+        """
+        incidence_t = self.incidence.T
+        scores = WEAK_SKILL_WEIGHT * (weak @ incidence_t)
+        scores += COMPLETED_SKILL_WEIGHT * (completed @ incidence_t) * self.advanced
+        scores += BEGINNER_BONUS * (no_completed[:, None] & self.beginner)
+        scores += PREFERRED_LP_BONUS * (preferred[:, None] == self.course_lp)
+
+        return scores
+
+    def explain(self, positions, completed_skills, weak_skills):
+        """
+        Structured reason for each of the given (already ranked) courses
+
+        Uses the incidence rows the scores came from instead of matching the
+        course names again. The reason is the first weak skill of the course
+        in weak_skills order, else the first completed skill in
+        completed_skills order, else a level match.
+
+        Args:
+            positions: Course positions, typically the top-k
+            completed_skills: dict of completed skill -> count
+            weak_skills: dict of weak skill -> count
+
+        Returns:
+            List of (reason_code, skill) tuples aligned with positions;
+            skill is None for REASON_LEVEL_MATCH
+        """
+        reasons = [(REASON_LEVEL_MATCH, None)] * len(positions)
+        if not reasons:
+            return reasons
+
+        has_skill = self.incidence[np.asarray(positions, dtype=np.int64)] > 0
+        rows = np.arange(len(positions))
+
+        # Weak skills take precedence, so they are applied last
+        for code, skills in ((REASON_SKILL_PROGRESSION, completed_skills), (REASON_WEAK_SKILL, weak_skills)):
+            if not skills:
+                continue
+            ranks = np.where(has_skill, self._rank_vector(skills), len(skills))
+            first = ranks.argmin(axis=1)
+            for row in np.flatnonzero(ranks[rows, first] < len(skills)):
+                reasons[row] = (code, self.skills[first[row]])
+
+        return reasons
+
+    def _rank_vector(self, skills):
+        """Position of every skill in the iteration order of a skill dict, len(skills) if absent"""
+        ranks = np.full(len(self.skills), len(skills), dtype=np.int64)
+        for rank, skill in enumerate(skills):
+            position = self.skill_positions.get(skill)
+            if position is not None:
+                ranks[position] = rank
+        return ranks
+
+
+def top_k(positions, scores, k):
+    """
+    Select the k best positive scores
+
+    Ties keep catalog order, matching a stable sort by descending score.
+
+    Args:
+        positions: Sorted course positions
+        scores: Scores aligned with positions
+        k: Number of results
+
+    Returns:
+        List of (position, score) pairs, best first
+    """
+    if k <= 0:
+        return []
+
+    positive = scores > 0
+    positions = positions[positive]
+    scores = scores[positive]
+
+    if len(scores) > k:
+        # Score of the k-th best course; everything above it is in, ties fill up in catalog order
+        kth = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = scores > kth
+        tied = np.flatnonzero(scores == kth)[:k - int(above.sum())]
+        keep = np.concatenate([np.flatnonzero(above), tied])
+        positions = positions[keep]
+        scores = scores[keep]
+
+    order = np.lexsort((positions, -scores))
+    return [(int(positions[i]), int(scores[i])) for i in order]
+
+
+class RankedList:
+    """
+    One user's courses ranked by score, selected only as deep as pages are requested
+
+    Scores are computed once. The first page selects limit + 1 courses (to
+    know whether a next page exists) and every deeper page at least doubles
+    the selection depth, so paging never sorts the whole candidate list.
+    Instances are cached and shared between requests; they are only ever
+    extended, never modified in place.
+    """
+
+    def __init__(self, scorer, completed_skills, weak_skills, preferences):
+        """
+        Args:
+            scorer: VectorScorer of the state the ranking belongs to
+            completed_skills: dict of completed skill -> count
+            weak_skills: dict of weak skill -> count
+            preferences: User preferences dict
+        """
+        self.scorer = scorer
+        self.completed_skills = completed_skills
+        self.weak_skills = weak_skills
+
+        # Only courses sharing a skill, beginner courses or the preferred LP can score
+        candidates = scorer.index.candidates(completed_skills, weak_skills, preferences)
+
+        # Score candidates with one matrix-vector product
+        self._positions, self._scores = scorer.score(completed_skills, weak_skills, preferences, candidates)
+
+        # (ranked pairs, whether every positive score is already included), swapped as one
+        self._selection = ([], False)
+
+    def page(self, cursor, limit):
+        """
+        Return one page of the ranking
+
+        Args:
+            cursor: Offset of the first result
+            limit: Maximum number of results
+
+        Returns:
+            (list of (position, score) pairs, next cursor or None on the last page)
+        """
+        end = cursor + limit
+        ranked, exhausted = self._selection
+        if len(ranked) <= end and not exhausted:
+            depth = max(end + 1, 2 * len(ranked))
+            ranked = top_k(self._positions, self._scores, depth)
+            exhausted = len(ranked) < depth
+            self._selection = (ranked, exhausted)
+
+        return ranked[cursor:end], (end if len(ranked) > end else None)
@@ -0,0 +1,100 @@
+"""
+Item-item "similar courses" neighbour table
+Built offline by ml/scripts/build_similarity_index.py from co-enrollment in
+student_progress. Serving a course's neighbours is a single row lookup in a
+memory-mapped table.
+"""
+import os
+import numpy as np
+from services.artifacts import ArtifactStore, load_artifact
+
+SIMILAR_COURSES_ARTIFACT_KIND = 'similar_courses'
+SIMILAR_COURSES_PATH = os.getenv(
+    'SIMILAR_COURSES_PATH',
+    os.path.join(os.path.dirname(__file__), '../../ml/models/similar_courses')
+)
+SIMILAR_COURSES_CHECK_SECONDS = int(os.getenv('SIMILAR_COURSES_CHECK_SECONDS', 30))
+
+
+class SimilarCoursesIndex:
+    """
+    Top-N neighbours per course
+
+    neighbors[i] holds row numbers into course_ids (padded with -1), best
+    first, and similarities[i] the matching similarity scores.
+    """
+
+    def __init__(self, course_ids, neighbors, similarities, metric='cosine'):
+        self.course_ids = course_ids
+        self.neighbors = neighbors
+        self.similarities = similarities
+        self.metric = metric
+        self.course_index = {course_id: row for row, course_id in enumerate(course_ids.tolist())}
+
+    @classmethod
+    def load(cls, path):
+        """Load (memory-map) a neighbour table artifact written by build_similarity_index.py"""
+        manifest, arrays = load_artifact(path, SIMILAR_COURSES_ARTIFACT_KIND)
+        return cls(
+            arrays['course_ids'],
+            arrays['neighbors'],
+            arrays['similarities'],
+            manifest['metadata'].get('metric', 'cosine')
+        )
+
+    def similar(self, course_id, limit=10):
+        """
+        Return up to limit (course_id, similarity) pairs for a course, best first
+        """
+        row = self.course_index.get(course_id)
+        if row is None:
+            return []
+
+        neighbors = self.neighbors[row, :limit]
+        valid = neighbors >= 0
+        return list(zip(
+            self.course_ids[neighbors[valid]].tolist(),
+            self.similarities[row, :limit][valid].tolist()
+        ))
+
+    def candidates(self, course_ids, exclude=(), limit=10):
+        """
+        Courses most similar to a set of courses, for users with little history
+
+        Similarities to every seed course are summed.
+
+        Args:
+            course_ids: Seed courses (e.g. the user's enrolled courses)
+            exclude: Course ids that must not be returned
+            limit: Number of candidates
+
+        Returns:
+            List of (course_id, summed similarity) pairs, best first
+        """
+        rows = [self.course_index[course_id] for course_id in course_ids if course_id in self.course_index]
+        if not rows or limit <= 0:
+            return []
+
+        neighbors = self.neighbors[rows].ravel()
+        similarities = self.similarities[rows].ravel()
+        valid = neighbors >= 0
+        scores = np.bincount(neighbors[valid], weights=similarities[valid], minlength=len(self.course_ids))
+
+        excluded = [self.course_index[course_id] for course_id in exclude if course_id in self.course_index]
+        scores[excluded] = 0.0
+
+        limit = min(limit, len(scores))
+        best = np.argpartition(-scores, limit - 1)[:limit]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        best = best[scores[best] > 0]
+        return list(zip(self.course_ids[best].tolist(), scores[best].tolist()))
+
+
+class SimilarCoursesStore(ArtifactStore):
+    """Process-wide holder of the current SimilarCoursesIndex"""
+
+    def __init__(self, path=SIMILAR_COURSES_PATH, check_interval=SIMILAR_COURSES_CHECK_SECONDS):
+        super().__init__(path, SimilarCoursesIndex.load, check_interval, 'similar courses index')
+
+
+similar_courses_store = SimilarCoursesStore()
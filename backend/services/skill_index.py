@@ -0,0 +1,82 @@
+"""
+Course/skill inverted index
+Built once per catalog snapshot and skill keyword set so recommendation scoring
+only visits courses that can score above zero for a given user.
+"""
+from services.catalog import BEGINNER_LEVELS
+
+
+class CourseSkillIndex:
+    """
+    Maps courses to the skill keywords in their names and back
+
+    Courses are referred to by their position in catalog.courses, which keeps
+    candidate lists sortable into catalog order.
+    """
+
+    def __init__(self, catalog, skill_matcher):
+        """
+        Build the index
+
+        Args:
+            catalog: CatalogSnapshot to index
+            skill_matcher: SkillMatcher compiled from the current skill keywords
+        """
+        self.catalog = catalog
+        self.skill_matcher = skill_matcher
+
+        course_skills = []
+        skill_courses = {}
+        beginner_courses = []
+        lp_courses = {}
+
+        for position, course in enumerate(catalog.courses):
+            skills = tuple(skill_matcher.match(course.get('course_name', '')))
+            course_skills.append(skills)
+            for skill in skills:
+                skill_courses.setdefault(skill, []).append(position)
+
+            if course.get('course_level_str', '') in BEGINNER_LEVELS:
+                beginner_courses.append(position)
+
+            lp_id = course.get('learning_path_id')
+            if lp_id is not None:
+                lp_courses.setdefault(lp_id, []).append(position)
+
+        self.course_skills = tuple(course_skills)
+        self.skill_courses = {skill: tuple(positions) for skill, positions in skill_courses.items()}
+        self.beginner_courses = tuple(beginner_courses)
+        self.lp_courses = {lp_id: tuple(positions) for lp_id, positions in lp_courses.items()}
+
+    def candidates(self, completed_skills, weak_skills, preferences):
+        """
+        Collect courses that can get a positive score
+
+        Args:
+            completed_skills: dict of completed skill -> count
+            weak_skills: dict of weak skill -> count
+            preferences: User preferences dict
+
+        Returns:
+            Sorted list of course positions in catalog order
+        """
+        positions = set()
+
+        for skill in weak_skills:
+            positions.update(self.skill_courses.get(skill, ()))
+        for skill in completed_skills:
+            positions.update(self.skill_courses.get(skill, ()))
+
+        # Users without completed skills get the beginner bonus
+        if not completed_skills:
+            positions.update(self.beginner_courses)
+
+        preferred_lp = preferences.get('preferred_learning_path_id')
+        if preferred_lp:
+            try:
+                positions.update(self.lp_courses.get(preferred_lp, ()))
+            except TypeError:
+                # Unhashable preference values never equal a course learning_path_id
+                pass
+
+        return sorted(positions)
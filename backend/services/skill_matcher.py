@@ -0,0 +1,127 @@
+"""
+Multi-pattern skill keyword matcher
+Aho-Corasick automaton built once from skill_keywords so that every keyword hit
+in a course name is found in a single pass over the string.
+"""
+import os
+
+SKILL_MATCH_WORD_BOUNDARY = os.getenv('SKILL_MATCH_WORD_BOUNDARY', 'false').lower() == 'true'
+
+
+class SkillMatcher:
+    """
+    Find skill keywords inside course names
+
+    With word_boundary=False a hit behaves exactly like `keyword in text.lower()`.
+    With word_boundary=True a hit must not be surrounded by letters or digits,
+    so 'java' no longer matches inside 'javascript'.
+    """
+
+    def __init__(self, keywords, word_boundary=SKILL_MATCH_WORD_BOUNDARY):
+        """
+        Build the automaton
+
+        Args:
+            keywords: Iterable of keyword strings, in skill_keywords order.
+                      A keyword listed several times is kept once and its
+                      count is exposed through `multiplicity`.
+            word_boundary: Only report whole-word hits
+        """
+        self.word_boundary = word_boundary
+        self.keywords = []
+        self.multiplicity = {}
+        for keyword in keywords:
+            keyword = keyword.lower()
+            if keyword not in self.multiplicity:
+                self.keywords.append(keyword)
+                self.multiplicity[keyword] = 0
+            self.multiplicity[keyword] += 1
+        self.keywords = tuple(self.keywords)
+
+        # An empty keyword is a substring of everything
+        self._always = tuple(
+            i for i, keyword in enumerate(self.keywords)
+            if not keyword and not word_boundary
+        )
+
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        self._build()
+
+    def _build(self):
+        # Trie
+        for index, keyword in enumerate(self.keywords):
+            if not keyword:
+                continue
+            state = 0
+            for ch in keyword:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = next_state
+            self._out[state].append(index)
+
+        # Failure links, breadth first
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._out[next_state].extend(self._out[self._fail[next_state]])
+
+        self._out = [tuple(out) for out in self._out]
+
+    def match(self, text):
+        """
+        Return the distinct keywords found in text
+
+        Args:
+            text: String to scan (matching is case-insensitive)
+
+        Returns:
+            List of keywords in skill_keywords order
+        """
+        if not text:
+            return [self.keywords[i] for i in self._always]
+
+        text = text.lower()
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        hits = set(self._always)
+
+        state = 0
+        for pos, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                if self.word_boundary:
+                    for index in out[state]:
+                        if self._is_whole_word(text, pos, len(self.keywords[index])):
+                            hits.add(index)
+                else:
+                    hits.update(out[state])
+
+        return [self.keywords[i] for i in sorted(hits)]
+
+    @staticmethod
+    def _is_whole_word(text, end, length):
+        start = end - length + 1
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if end + 1 < len(text) and text[end + 1].isalnum():
+            return False
+        return True
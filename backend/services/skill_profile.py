@@ -0,0 +1,211 @@
+"""
+Persisted per-user skill profile
+Keeps completed / weak skill counts and per-course completion ratios in the
+skill_profiles collection so recommendations and the chat skill intent do not
+rescan the whole progress history. /api/progress/update applies the difference
+between the old and new progress row with a single $inc.
+"""
+from datetime import datetime
+from db import collections
+
+
+def _encode_key(key):
+    """Make a keyword or course name safe to use as a MongoDB field name"""
+    if key == '':
+        return '%'
+    return key.replace('%', '%25').replace('.', '%2E').replace('$', '%24')
+
+
+def _decode_key(key):
+    if key == '%':
+        return ''
+    return key.replace('%24', '$').replace('%2E', '.').replace('%25', '%')
+
+
+def completion_ratio(progress):
+    """Completed tutorials over active tutorials, as used for weak skill detection"""
+    completed = progress.get('completed_tutorials') or 0
+    active = progress.get('active_tutorials') or 0
+    return completed / max(active, 1)
+
+
+class SkillProfileStore:
+    """
+    Read and incrementally maintain skill profiles
+
+    A profile is only valid for the keyword set it was built with; profiles
+    with another keywords_version are rebuilt from progress on the next read.
+    Every method takes the RecommenderState to match keywords against, so one
+    request never mixes keyword sets during a reload.
+
+    Every progress write bumps the profile's revision (creating a placeholder
+    without keywords_version if there is no profile yet). A rebuild only
+    stores its result while the revision is still the one it read before the
+    progress, so it never overwrites a newer write's state.
+    """
+
+    def __init__(self, recommender):
+        """
+        Args:
+            recommender: RecommenderService providing the skill rules
+        """
+        self.recommender = recommender
+
+    def get(self, state, email, user_progress=None):
+        """
+        Return (completed_skills, weak_skills) for a user
+
+        Args:
+            state: RecommenderState the profile must match
+            email: User email
+            user_progress: Progress documents, used if the user has no profile
+                at all (an outdated profile is rebuilt from progress re-read
+                after its revision)
+
+        Returns:
+            Tuple of dicts skill -> count
+        """
+        doc = None
+        if collections['skill_profiles'] is not None:
+            doc = collections['skill_profiles'].find_one({'email': email}, {'_id': 0})
+            if doc and doc.get('keywords_version') == state.keywords_version:
+                return self._decode_counts(doc.get('completed')), self._decode_counts(doc.get('weak'))
+
+        if user_progress is None or doc is not None:
+            user_progress = self._load_progress([email]).get(email, [])
+        return self.rebuild(state, email, user_progress, doc)
+
+    def get_many(self, state, emails):
+        """
+        Return profiles for many users with one $in query
+
+        Missing or outdated profiles are rebuilt from one $in progress query.
+
+        Returns:
+            dict of email -> (completed_skills, weak_skills)
+        """
+        profiles = {}
+        outdated = {}
+        if collections['skill_profiles'] is not None:
+            for doc in collections['skill_profiles'].find({'email': {'$in': emails}}, {'_id': 0}):
+                if doc.get('keywords_version') == state.keywords_version:
+                    profiles[doc['email']] = (self._decode_counts(doc.get('completed')),
+                                              self._decode_counts(doc.get('weak')))
+                else:
+                    outdated[doc['email']] = doc
+
+        missing = [email for email in emails if email not in profiles]
+        if missing:
+            # Read after the profiles, so their revisions guard these progress rows
+            progress_by_email = self._load_progress(missing)
+            for email in missing:
+                profiles[email] = self.rebuild(state, email, progress_by_email.get(email, []),
+                                               outdated.get(email))
+
+        return profiles
+
+    def rebuild(self, state, email, user_progress, current=None):
+        """
+        Recompute a profile from the full progress history and store it
+
+        Args:
+            state: RecommenderState to match keywords against
+            email: User email
+            user_progress: The user's progress documents
+            current: Stored profile document read before user_progress, or
+                None if the user had no profile
+
+        The result is always returned, but only stored if no progress write
+        happened in the meantime: without a profile it is inserted only if
+        none exists yet (a write creates a placeholder), otherwise it replaces
+        the profile only while its revision is unchanged.
+        """
+        completed_skills = self.recommender._extract_completed_skills(user_progress, state)
+        weak_skills = self.recommender._identify_weak_skills(user_progress, state)
+
+        if collections['skill_profiles'] is not None:
+            revision = current.get('revision', 0) if current is not None else 0
+            profile = {
+                'email': email,
+                'keywords_version': state.keywords_version,
+                'revision': revision,
+                'completed': {_encode_key(k): v for k, v in completed_skills.items()},
+                'weak': {_encode_key(k): v for k, v in weak_skills.items()},
+                'completion_ratios': {
+                    _encode_key(p.get('course_name') or ''): completion_ratio(p)
+                    for p in user_progress
+                },
+                'updated_at': datetime.utcnow().isoformat()
+            }
+            if current is None:
+                collections['skill_profiles'].update_one({'email': email}, {'$setOnInsert': profile}, upsert=True)
+            else:
+                # Profiles stored before revisions existed have none
+                expected = revision if 'revision' in current else {'$exists': False}
+                collections['skill_profiles'].replace_one({'email': email, 'revision': expected}, profile)
+
+        return completed_skills, weak_skills
+
+    def apply_update(self, state, email, old_progress, new_progress):
+        """
+        Apply one progress row change to the stored profile
+
+        Only the difference between the old and new row is written. If the
+        user has no current profile, the stored document only gets its
+        revision bumped (and is marked outdated); it is built from the full
+        history on the next read.
+
+        Args:
+            state: RecommenderState the stored profile must match
+            email: User email
+            old_progress: Progress row before the update (None for a new row)
+            new_progress: Progress row after the update
+        """
+        if collections['skill_profiles'] is None:
+            return
+
+        increments = {}
+        for sign, progress in ((-1, old_progress), (1, new_progress)):
+            if not progress:
+                continue
+            for field, counts in (('completed', self.recommender._extract_completed_skills([progress], state)),
+                                  ('weak', self.recommender._identify_weak_skills([progress], state))):
+                for skill, count in counts.items():
+                    key = f'{field}.{_encode_key(skill)}'
+                    increments[key] = increments.get(key, 0) + sign * count
+
+        update = {
+            '$set': {
+                f"completion_ratios.{_encode_key(new_progress.get('course_name') or '')}": completion_ratio(new_progress),
+                'updated_at': datetime.utcnow().isoformat()
+            }
+        }
+        increments = {key: value for key, value in increments.items() if value}
+        update['$inc'] = dict(increments, revision=1)
+
+        result = collections['skill_profiles'].update_one(
+            {'email': email, 'keywords_version': state.keywords_version},
+            update
+        )
+        if result.matched_count == 0:
+            # No current profile: leave a newer revision behind, so a rebuild
+            # that read progress before this write does not store its result.
+            # Unsetting keywords_version also catches a rebuild inserted between
+            # the two updates, whose counts would miss this write.
+            collections['skill_profiles'].update_one(
+                {'email': email},
+                {'$inc': {'revision': 1}, '$unset': {'keywords_version': ''}},
+                upsert=True
+            )
+
+    @staticmethod
+    def _decode_counts(counts):
+        return {_decode_key(k): v for k, v in (counts or {}).items() if v > 0}
+
+    @staticmethod
+    def _load_progress(emails):
+        progress_by_email = {}
+        if collections['student_progress'] is not None:
+            for progress in collections['student_progress'].find({'email': {'$in': emails}}, {'_id': 0}):
+                progress_by_email.setdefault(progress.get('email'), []).append(progress)
+        return progress_by_email
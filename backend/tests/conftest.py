@@ -0,0 +1,41 @@
+"""
+Test setup: an in-memory MongoDB (mongomock) stands in for the db module, so
+tests never connect to a real server
+"""
+import os
+import sys
+import types
+import mongomock
+from pymongo import InsertOne, ReplaceOne, UpdateOne
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'scripts'))
+
+COLLECTION_NAMES = (
+    'learning_paths', 'courses', 'tutorials', 'course_levels', 'learning_path_answers',
+    'current_interest_questions', 'current_tech_questions', 'skill_keywords', 'student_progress',
+    'users', 'catalog_meta', 'recommendations', 'skill_profiles'
+)
+
+client = mongomock.MongoClient()
+db = client['learning_buddy_test']
+db_module = types.ModuleType('db')
+db_module.client = client
+db_module.db = db
+db_module.collections = {name: db[name] for name in COLLECTION_NAMES}
+sys.modules['db'] = db_module
+
+
+def _bulk_write(self, requests, ordered=True, **kwargs):
+    # mongomock cannot read the operation objects of newer pymongo releases
+    for request in requests:
+        if isinstance(request, ReplaceOne):
+            self.replace_one(request._filter, request._doc, upsert=request._upsert)
+        elif isinstance(request, UpdateOne):
+            self.update_one(request._filter, request._doc, upsert=request._upsert)
+        elif isinstance(request, InsertOne):
+            self.insert_one(request._doc)
+
+
+mongomock.collection.Collection.bulk_write = _bulk_write
@@ -0,0 +1,97 @@
+"""
+Materialized recommendations of the rule-based and ML engines live side by side
+"""
+import pytest
+from db import collections
+import materialize_recommendations
+from services.recommender import get_recommender
+
+EMAILS = [f'user{i}@example.com' for i in range(6)]
+
+ML_RESULT = {
+    'recommended_courses': [{'course_id': 3, 'reason_code': 'similar_learners'}],
+    'recommended_learning_paths': [],
+    'skill_analysis': {'completed_skills': [], 'weak_areas': []},
+    'next_cursor': None
+}
+
+
+@pytest.fixture(autouse=True)
+def seeded():
+    for collection in collections.values():
+        collection.delete_many({})
+    collections['skill_keywords'].insert_many(
+        [{'id': i, 'keyword': keyword} for i, keyword in enumerate(['Python', 'Web', 'Android', 'Data'], start=1)]
+    )
+    collections['course_levels'].insert_many([{'id': 1, 'course_level': 'Dasar'}, {'id': 2, 'course_level': 'Menengah'}])
+    collections['learning_paths'].insert_many([
+        {'learning_path_id': 1, 'learning_path_name': 'Back-End Developer', 'course_name': 'x'},
+        {'learning_path_id': 2, 'learning_path_name': 'Android Developer', 'course_name': 'x'}
+    ])
+    names = ['Belajar Dasar Python', 'Belajar Web Dasar', 'Belajar Android Pemula', 'Belajar Data Python',
+             'Menjadi Web Developer', 'Belajar Android Lanjut']
+    collections['courses'].insert_many([
+        {'course_id': i, 'course_name': name, 'learning_path_id': 1 + i % 2,
+         'course_level_str': 'Dasar' if i < 3 else 'Menengah', 'hours_to_study': 10 * (i + 1)}
+        for i, name in enumerate(names)
+    ])
+    for i, email in enumerate(EMAILS):
+        collections['users'].insert_one({'email': email, 'name': f'User {i}', 'progress_version': i})
+        collections['student_progress'].insert_many([
+            {'email': email, 'course_name': names[(i + offset) % len(names)], 'active_tutorials': 5,
+             'completed_tutorials': offset * 2, 'is_graduated': 1 if offset == 2 else 0}
+            for offset in range(3)
+        ])
+    materialize_recommendations.ensure_indexes()
+    materialize_recommendations._init_worker('rule')
+
+
+def _fake_ml_results(emails):
+    for email in emails:
+        yield collections['users'].find_one({'email': email}), ML_RESULT
+
+
+def _materialized_rule_results():
+    recommender = get_recommender()
+    return {
+        email: recommender._get_materialized(collections['users'].find_one({'email': email}), recommender.state)
+        for email in EMAILS
+    }
+
+
+def test_rule_then_ml_run_keeps_rule_documents_served(monkeypatch):
+    assert materialize_recommendations.materialize_chunk(EMAILS, 'rule') == len(EMAILS)
+    rule_data = {doc['email']: doc['data'] for doc in collections['recommendations'].find({'engine': 'rule'})}
+
+    monkeypatch.setattr(materialize_recommendations, '_ml_results', _fake_ml_results)
+    progress_versions = {email: i for i, email in enumerate(EMAILS)}
+    assert materialize_recommendations.materialize_chunk(EMAILS, 'ml', progress_versions) == len(EMAILS)
+
+    assert collections['recommendations'].count_documents({'engine': 'rule'}) == len(EMAILS)
+    assert collections['recommendations'].count_documents({'engine': 'ml'}) == len(EMAILS)
+    served = _materialized_rule_results()
+    assert all(served[email] is not None for email in EMAILS)
+    assert served == rule_data
+
+
+def test_ml_then_rule_run_keeps_ml_documents(monkeypatch):
+    monkeypatch.setattr(materialize_recommendations, '_ml_results', _fake_ml_results)
+    materialize_recommendations.materialize_chunk(EMAILS, 'ml', {email: 0 for email in EMAILS})
+    materialize_recommendations.materialize_chunk(EMAILS, 'rule')
+
+    ml_docs = list(collections['recommendations'].find({'engine': 'ml'}))
+    assert sorted(doc['email'] for doc in ml_docs) == EMAILS
+    assert all(doc['data'] == ML_RESULT for doc in ml_docs)
+    assert all(data is not None for data in _materialized_rule_results().values())
+
+
+def test_ensure_indexes_replaces_the_email_only_index():
+    recommendations = collections['recommendations']
+    recommendations.drop_indexes()
+    recommendations.create_index('email', unique=True)
+
+    materialize_recommendations.ensure_indexes()
+
+    indexes = recommendations.index_information()
+    assert 'email_1' not in indexes
+    assert indexes['email_1_engine_1']['unique']
@@ -0,0 +1,139 @@
+"""
+Script untuk membangun index "similar courses" (item-item) dari co-enrollment
+Menghitung X'X atas sparse matrix user x course dari student_progress, lalu
+menyimpan top-N tetangga per course sebagai tabel kecil yang dibaca oleh
+GET /api/courses/<id>/similar dan cold-start MLRecommenderService.
+"""
+import os
+import sys
+import argparse
+import numpy as np
+
+# Add parent directory to path untuk import dari backend
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../services'))
+
+from db import collections
+from services.artifacts import save_artifact
+from services.similar_courses import SIMILAR_COURSES_PATH, SIMILAR_COURSES_ARTIFACT_KIND
+from als import build_interaction_matrix
+from feature_store import FeatureStore
+
+
+def load_enrollments():
+    """
+    Load (email, course_name) pairs dari feature store (incremental refresh
+    from MongoDB) dan mapping course_name -> course_id dari MongoDB
+    """
+    store = FeatureStore()
+    store.refresh()
+    progress = store.load_progress(columns=['email', 'course_name'])
+
+    course_ids_by_name = {}
+    for course in collections['courses'].find({}, {'_id': 0, 'course_id': 1, 'course_name': 1}):
+        course_ids_by_name.setdefault(course.get('course_name'), course.get('course_id'))
+
+    return progress, course_ids_by_name
+
+
+def build_neighbor_table(enrollments, metric='cosine', top_n=20, min_support=2):
+    """
+    Top-N most similar courses per course
+
+    Args:
+        enrollments: Sparse user x course matrix; any stored value counts as enrolled
+        metric: 'cosine' or 'jaccard'
+        top_n: Neighbours kept per course
+        min_support: Minimum number of shared users for a pair to count
+
+    Returns:
+        (neighbors int32 array, similarities float32 array), both (n_courses, top_n);
+        neighbors are column numbers padded with -1
+    """
+    enrolled = enrollments.tocsr(copy=True)
+    enrolled.data[:] = 1.0
+
+    # Co-enrollment counts for every course pair with one sparse product
+    co = (enrolled.T @ enrolled).tocsr()
+    counts = co.diagonal()
+    co.setdiag(0)
+    co.data[co.data < min_support] = 0
+    co.eliminate_zeros()
+
+    rows = np.repeat(np.arange(co.shape[0]), np.diff(co.indptr))
+    if metric == 'jaccard':
+        co.data = co.data / (counts[rows] + counts[co.indices] - co.data)
+    else:
+        co.data = co.data / np.sqrt(counts[rows] * counts[co.indices])
+
+    n_courses = co.shape[0]
+    neighbors = np.full((n_courses, top_n), -1, dtype=np.int32)
+    similarities = np.zeros((n_courses, top_n), dtype=np.float32)
+    for row in range(n_courses):
+        start, end = co.indptr[row], co.indptr[row + 1]
+        if start == end:
+            continue
+        columns = co.indices[start:end]
+        scores = co.data[start:end]
+        if len(scores) > top_n:
+            keep = np.argpartition(-scores, top_n - 1)[:top_n]
+            columns, scores = columns[keep], scores[keep]
+        order = np.lexsort((columns, -scores))
+        neighbors[row, :len(order)] = columns[order]
+        similarities[row, :len(order)] = scores[order]
+
+    return neighbors, similarities
+
+
+def save_neighbor_table(path, course_ids, neighbors, similarities, metric):
+    """Save the table as a memory-mappable artifact (.npy arrays + manifest.json)"""
+    save_artifact(
+        path,
+        SIMILAR_COURSES_ARTIFACT_KIND,
+        {
+            'course_ids': course_ids,
+            'neighbors': neighbors,
+            'similarities': similarities
+        },
+        {'metric': metric, 'top_n': int(neighbors.shape[1])}
+    )
+    print(f"Similar courses index saved to {path}")
+
+
+def main():
+    """Main index build function"""
+    parser = argparse.ArgumentParser(description='Build the similar courses neighbour table')
+    parser.add_argument('--metric', choices=['cosine', 'jaccard'], default='cosine')
+    parser.add_argument('--top-n', type=int, default=20)
+    parser.add_argument('--min-support', type=int, default=2)
+    parser.add_argument('--output', default=SIMILAR_COURSES_PATH)
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("Building Similar Courses Index")
+    print("=" * 50)
+
+    if collections['student_progress'] is None or collections['courses'] is None:
+        print("[ERROR] MongoDB connection failed. Please check your MONGO_URI in .env file")
+        return
+
+    progress, course_ids_by_name = load_enrollments()
+    if progress.empty:
+        print("No student progress data!")
+        return
+
+    enrollments, _, course_ids = build_interaction_matrix(progress, course_ids_by_name)
+    print(f"Enrollment matrix: {enrollments.shape[0]} users x {enrollments.shape[1]} courses")
+
+    neighbors, similarities = build_neighbor_table(enrollments, args.metric, args.top_n, args.min_support)
+    print(f"Courses with neighbours: {int((neighbors[:, 0] >= 0).sum())}/{len(course_ids)}")
+
+    save_neighbor_table(os.path.abspath(args.output), course_ids, neighbors, similarities, args.metric)
+
+    print("=" * 50)
+    print("Index build completed!")
+    print("=" * 50)
+
+
+if __name__ == '__main__':
+    main()
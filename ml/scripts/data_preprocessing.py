@@ -6,43 +6,70 @@ import pandas as pd
 import numpy as np
 import os
 import sys
+import argparse
 
 # Add parent directory to path
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../services'))
 
 from db import collections
+from services.catalog import DEFAULT_LEVEL_ORDER
+from feature_store import FeatureStore, export_collection
 
-def load_from_mongodb():
+# Target dtype per column of the training table (clean_data):
+#   'category'  string keys, stored once per distinct value plus integer codes
+#   'code'      integer ids and ordinals, smallest integer type (missing = -1)
+#   'count'     counters, smallest integer type that fits (missing = 0)
+#   'flag'      0/1 columns as nullable boolean (missing stays <NA>)
+#   'score'     measurements that stay missing when absent, as float32
+CLEAN_SCHEMA = {
+    'name': 'category',
+    'email': 'category',
+    'course_name': 'category',
+    'course_level_str': 'category',
+    'learning_path_name': 'category',
+    'course_id': 'code',
+    'learning_path_id': 'code',
+    'course_level': 'code',
+    'active_tutorials': 'count',
+    'tutorial_count': 'count',
+    'completed_tutorials': 'count',
+    'is_graduated': 'flag',
+    'already_generated_certificate': 'flag',
+    'submission_rating': 'score',
+    'exam_score': 'score',
+    'hours_to_study': 'score'
+}
+
+def load_from_mongodb(full=False):
     """
     Load data dari MongoDB collections
+    
+    student_progress comes from the feature store, refreshed incrementally
+    (only documents changed since the last run are pulled). The small
+    collections are streamed to data/raw/<name>.parquet and read back as
+    typed columns.
+    
+    Args:
+        full: Rebuild the feature store from a full export
     """
     print("Loading data from MongoDB...")
     
     data = {}
     
-    # Load student progress
-    if collections.get('student_progress'):
-        progress = list(collections['student_progress'].find({}))
-        data['student_progress'] = pd.DataFrame(progress)
-        print(f"Loaded {len(progress)} student progress records")
-    
-    # Load courses
-    if collections.get('courses'):
-        courses = list(collections['courses'].find({}))
-        data['courses'] = pd.DataFrame(courses)
-        print(f"Loaded {len(courses)} courses")
-    
-    # Load learning paths
-    if collections.get('learning_paths'):
-        learning_paths = list(collections['learning_paths'].find({}))
-        data['learning_paths'] = pd.DataFrame(learning_paths)
-        print(f"Loaded {len(learning_paths)} learning paths")
-    
-    # Load skill keywords
-    if collections.get('skill_keywords'):
-        skill_keywords = list(collections['skill_keywords'].find({}))
-        data['skill_keywords'] = pd.DataFrame(skill_keywords)
-        print(f"Loaded {len(skill_keywords)} skill keywords")
+    if collections.get('student_progress') is not None:
+        store = FeatureStore()
+        refresh = store.refresh(full=full)
+        data['student_progress'] = store.load_progress()
+        print(f"Loaded {refresh['rows']} student progress records "
+              f"({refresh['mode']} refresh, {refresh['pulled']} pulled, watermark {refresh['watermark']})")
+    
+    for name in ('courses', 'learning_paths', 'skill_keywords', 'tutorials', 'course_levels'):
+        if collections.get(name) is None:
+            continue
+        path, rows = export_collection(name)
+        data[name] = pd.read_parquet(path)
+        print(f"Loaded {rows} {name.replace('_', ' ')} records")
     
     return data
 
@@ -76,41 +103,122 @@ def load_from_excel():
     
     return data
 
+def build_course_table(data_dict):
+    """
+    One row per course_name with the columns merge_data attaches
+    
+    Learning path names, tutorial counts and level ordinals are looked up
+    on the (small) course table, so progress rows only need one join.
+    Level ordinals come from course_levels, falling back to the catalog's
+    default order like services.catalog.
+    """
+    courses = data_dict['courses']
+    courses = courses[courses['course_name'].notna()].drop_duplicates('course_name', ignore_index=True)
+    
+    learning_paths = data_dict.get('learning_paths')
+    if learning_paths is not None and 'learning_path_id' in learning_paths:
+        # learning_paths has one document per LP + course + tutorial row
+        names = (learning_paths[learning_paths['learning_path_id'].notna()]
+                 .drop_duplicates('learning_path_id')
+                 .set_index('learning_path_id')['learning_path_name'])
+        courses['learning_path_name'] = courses['learning_path_id'].map(names)
+    else:
+        courses['learning_path_name'] = None
+    
+    tutorials = data_dict.get('tutorials')
+    if tutorials is not None and len(tutorials):
+        courses['tutorial_count'] = courses['course_id'].map(tutorials.groupby('course_id').size()).fillna(0)
+    else:
+        courses['tutorial_count'] = 0
+    
+    levels = data_dict.get('course_levels')
+    level_order = {}
+    if levels is not None and len(levels):
+        known = levels[levels['course_level'].notna() & levels['id'].notna()]
+        level_order = dict(zip(known['course_level'], known['id']))
+    courses['course_level'] = courses['course_level_str'].map(level_order or DEFAULT_LEVEL_ORDER)
+    
+    return courses[['course_name', 'course_id', 'learning_path_id', 'learning_path_name',
+                    'course_level_str', 'course_level', 'hours_to_study', 'tutorial_count']]
+
 def merge_data(data_dict):
     """
     Merge data dari berbagai sumber untuk training
-    Tim ML dapat customize method ini sesuai kebutuhan
+    
+    Produces one denormalized table: every student_progress row plus its
+    course's course_id, learning_path_id, learning_path_name,
+    course_level_str, course_level (ordinal), hours_to_study and
+    tutorial_count. Each distinct course_name is resolved to a course table
+    position once (factorize, or the codes of a categorical column), and all
+    course columns are gathered with those positions in one vectorized
+    reindex. Rows whose course_name is not in the catalog keep the course
+    columns missing.
     """
     print("Merging data...")
     
-    # Contoh: Merge student progress dengan courses
-    if 'student_progress' in data_dict and 'courses' in data_dict:
-        progress_df = data_dict['student_progress']
-        courses_df = data_dict['courses']
-        
-        # Merge berdasarkan course_name atau course_id
-        # merged = pd.merge(progress_df, courses_df, on='course_id', how='left')
-        # return merged
+    if 'student_progress' not in data_dict or 'courses' not in data_dict:
+        # Nothing to join: return first available dataframe
+        if data_dict:
+            return list(data_dict.values())[0]
+        return pd.DataFrame()
+    
+    progress_df = data_dict['student_progress']
+    courses = build_course_table(data_dict)
     
-    # Return first available dataframe
-    if data_dict:
-        return list(data_dict.values())[0]
+    # Course table position of every distinct name, then of every row (-1 if unknown)
+    codes, names = pd.factorize(progress_df['course_name'])
+    name_positions = pd.Index(courses['course_name']).get_indexer(names)
+    positions = np.where(codes >= 0, name_positions[codes], -1)
     
-    return pd.DataFrame()
+    attached = courses.drop(columns='course_name').reindex(positions).reset_index(drop=True)
+    merged = pd.concat([progress_df.reset_index(drop=True), attached], axis=1)
+    
+    print(f"Merged {len(merged)} progress rows, {int((positions >= 0).sum())} matched a course")
+    return merged
+
+def optimize_dtypes(df, schema=CLEAN_SCHEMA):
+    """
+    Convert the columns listed in schema to compact dtypes, in place
+    
+    Columns not in schema (ids, updated_at) are left as they are.
+    """
+    for column, kind in schema.items():
+        if column not in df:
+            continue
+        if kind == 'category':
+            df[column] = df[column].astype('category')
+        elif kind == 'flag':
+            values = pd.to_numeric(df[column], errors='coerce')
+            df[column] = (values != 0).astype('boolean').mask(values.isna())
+        elif kind in ('code', 'count'):
+            # Stays float if a value is fractional, rather than truncating it
+            values = pd.to_numeric(df[column], errors='coerce').fillna(-1 if kind == 'code' else 0)
+            df[column] = pd.to_numeric(values, downcast='integer')
+        else:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype(np.float32)
+    return df
 
 def clean_data(df):
     """
     Clean data: handle missing values, outliers, etc.
+    
+    Works in place on df: columns are converted to the CLEAN_SCHEMA dtypes
+    first, so dropping duplicates (and later groupbys) compare integer codes
+    instead of Python strings.
     """
     print("Cleaning data...")
     
-    cleaned_df = df.copy()
+    cleaned_df = df
+    memory_before = cleaned_df.memory_usage(deep=True).sum()
+    
+    # Compact dtypes
+    optimize_dtypes(cleaned_df)
     
     # Handle missing values
     # cleaned_df = cleaned_df.dropna()  # atau fillna()
     
     # Remove duplicates
-    cleaned_df = cleaned_df.drop_duplicates()
+    cleaned_df.drop_duplicates(inplace=True, ignore_index=True)
     
     # Handle outliers (jika diperlukan)
     # Q1 = cleaned_df.quantile(0.25)
@@ -118,30 +226,37 @@ def clean_data(df):
     # IQR = Q3 - Q1
     # cleaned_df = cleaned_df[~((cleaned_df < (Q1 - 1.5 * IQR)) | (cleaned_df > (Q3 + 1.5 * IQR))).any(axis=1)]
     
-    print(f"Data cleaned: {len(cleaned_df)} rows remaining")
+    memory_after = cleaned_df.memory_usage(deep=True).sum()
+    print(f"Data cleaned: {len(cleaned_df)} rows remaining "
+          f"({memory_before / 2**20:.1f} MB -> {memory_after / 2**20:.1f} MB)")
     return cleaned_df
 
-def save_processed_data(df, filename='processed_data.csv'):
+def save_processed_data(df, filename='processed_data.parquet'):
     """
-    Save processed data ke folder data/processed
+    Save processed data ke folder data/processed (Parquet, typed columns)
     """
     processed_path = os.path.join(os.path.dirname(__file__), '../data/processed')
     os.makedirs(processed_path, exist_ok=True)
     
     filepath = os.path.join(processed_path, filename)
-    df.to_csv(filepath, index=False)
+    df.to_parquet(filepath, index=False)
     print(f"Processed data saved to {filepath}")
 
 def main():
     """
     Main preprocessing pipeline
     """
+    parser = argparse.ArgumentParser(description='Preprocess training data')
+    parser.add_argument('--full', action='store_true',
+                        help='Rebuild the feature store from a full export (re-imports are detected automatically)')
+    args = parser.parse_args()
+    
     print("=" * 50)
     print("Data Preprocessing Pipeline")
     print("=" * 50)
     
     # Option 1: Load from MongoDB
-    data = load_from_mongodb()
+    data = load_from_mongodb(full=args.full)
     
     # Option 2: Load from Excel (uncomment jika perlu)
     # data = load_from_excel()
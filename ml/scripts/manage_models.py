@@ -0,0 +1,53 @@
+"""
+Script untuk mengelola versi model di model registry (ml/models)
+Running API workers pick up pointer changes within ML_MODEL_CHECK_SECONDS,
+tanpa restart.
+
+    python scripts/manage_models.py list
+    python scripts/manage_models.py promote <version>    # serve (atau rollback)
+    python scripts/manage_models.py shadow <version>     # score sample requests in shadow mode
+    python scripts/manage_models.py unshadow
+"""
+import os
+import sys
+import argparse
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '../services'))
+
+from model_registry import ModelRegistry, MODEL_REGISTRY_PATH
+
+
+def main():
+    """Main registry command"""
+    parser = argparse.ArgumentParser(description='Manage recommendation model versions')
+    parser.add_argument('--registry', default=MODEL_REGISTRY_PATH)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('list')
+    subparsers.add_parser('promote').add_argument('version')
+    subparsers.add_parser('shadow').add_argument('version')
+    subparsers.add_parser('unshadow')
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+
+    if args.command == 'list':
+        current = registry.current_version()
+        candidate = registry.candidate_version()
+        for version in registry.list_versions():
+            marker = ' (current)' if version == current else ' (candidate)' if version == candidate else ''
+            print(f"{version}{marker}")
+    elif args.command == 'promote':
+        registry.set_current(args.version)
+        if registry.candidate_version() == args.version:
+            registry.clear_candidate()
+        print(f"[OK] Serving model version {args.version}")
+    elif args.command == 'shadow':
+        registry.set_candidate(args.version)
+        print(f"[OK] Shadow scoring model version {args.version}")
+    else:
+        registry.clear_candidate()
+        print("[OK] Shadow scoring stopped")
+
+
+if __name__ == '__main__':
+    main()
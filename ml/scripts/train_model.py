@@ -1,19 +1,35 @@
 """
-Template script untuk training model machine learning
-Tim ML dapat menggunakan script ini sebagai starting point untuk training model recommendation
+Script untuk training model recommendation (implicit ALS collaborative filtering)
+Membangun sparse matrix user x course dari student_progress lalu menyimpan model ke ml/models/
 """
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-import pickle
 import os
 import sys
+import json
+import argparse
+from datetime import datetime
 
 # Add parent directory to path untuk import dari backend
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../backend'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '../services'))
 
 from db import collections
+from als import ALSModel, ImplicitALS, build_interaction_matrix
+from model_registry import ModelRegistry, MODEL_REGISTRY_PATH
+from feature_store import FeatureStore
+from features import build_user_features, FEATURE_TABLE_PATH
+from evaluation import EvaluationSplit, compare_engines
+from hyperparameter_search import parameter_trials, run_search, SEARCH_WORKERS
+from services.recommender import get_recommender
+
+# ImplicitALS hyperparameters
+ALS_PARAMS = {
+    'factors': int(os.getenv('ALS_FACTORS', 64)),
+    'regularization': float(os.getenv('ALS_REGULARIZATION', 0.1)),
+    'alpha': float(os.getenv('ALS_ALPHA', 40.0)),
+    'iterations': int(os.getenv('ALS_ITERATIONS', 15))
+}
 
 class ModelTrainer:
     """
@@ -21,10 +37,16 @@ class ModelTrainer:
     Tim ML dapat extend class ini untuk implementasi model mereka
     """
     
-    def __init__(self):
+    def __init__(self, params=None):
         self.model = None
-        self.scaler = StandardScaler()
-        self.model_path = os.path.join(os.path.dirname(__file__), '../models')
+        self.params = dict(ALS_PARAMS, **(params or {}))
+        self.course_ids_by_name = {}
+        # Same registry MLRecommenderService serves from (ML_MODEL_REGISTRY_PATH)
+        self.model_path = MODEL_REGISTRY_PATH
+        self.version = None
+        self.evaluation = None
+        self.search_results = None
+        self.data_read_at = None
         
     def load_data(self):
         """
@@ -33,11 +55,20 @@ class ModelTrainer:
         """
         print("Loading data...")
         
-        # Option 1: Load dari MongoDB
+        # Progress stamped after this is not in the model (MLRecommenderService folds it in)
+        self.data_read_at = datetime.utcnow().isoformat()
+        
+        # Option 1: Load dari feature store (incremental refresh from MongoDB)
         data = []
-        if collections.get('student_progress'):
-            progress_data = list(collections['student_progress'].find({}))
-            data = pd.DataFrame(progress_data)
+        if collections.get('student_progress') is not None:
+            store = FeatureStore()
+            store.refresh()
+            data = store.load_progress()
+        
+        # Progress rows only carry course_name; map it to course_id
+        if collections.get('courses') is not None:
+            for course in collections['courses'].find({}, {'_id': 0, 'course_id': 1, 'course_name': 1}):
+                self.course_ids_by_name.setdefault(course.get('course_name'), course.get('course_id'))
         
         # Option 2: Load dari file CSV/Excel
         # data_path = os.path.join(os.path.dirname(__file__), '../data/raw/dataset.csv')
@@ -54,105 +85,215 @@ class ModelTrainer:
         """
         print("Preprocessing data...")
         
-        # Contoh preprocessing
-        # - Handle missing values
-        # - Feature engineering
-        # - Encoding categorical variables
-        # - Normalization/scaling
-        
-        processed_data = data.copy()
-        
-        # TODO: Implement preprocessing sesuai kebutuhan
-        # processed_data = processed_data.dropna()
-        # processed_data = pd.get_dummies(processed_data, columns=['category'])
+        # Rows without user or course cannot become an interaction
+        processed_data = data.dropna(subset=['email', 'course_name'])
         
         return processed_data
     
     def prepare_features(self, data):
         """
-        Prepare features (X) dan target (y) untuk training
+        Prepare the sparse user x course interaction matrix untuk training
+        
+        Implicit feedback has no target variable: every progress row is a
+        positive interaction weighted by completion ratio and exam score.
+        
+        Returns:
+            (weights csr_matrix, emails, course_ids)
         """
         print("Preparing features...")
         
-        # TODO: Define features dan target
-        # X = data[['feature1', 'feature2', ...]]
-        # y = data['target']
+        weights, emails, course_ids = build_interaction_matrix(data, self.course_ids_by_name)
+        print(f"Interaction matrix: {weights.shape[0]} users x {weights.shape[1]} courses, {weights.nnz} interactions")
         
-        # Placeholder
-        X = data
-        y = None
+        return weights, emails, course_ids
+    
+    def build_feature_table(self, data):
+        """
+        Compute the per-user feature table for every user at once and save it
+        (ml/models/user_features), so inference looks rows up instead of
+        recomputing them per request
+        """
+        print("Building user feature table...")
+        
+        state = get_recommender().state
+        table = build_user_features(data, state.skill_matcher, state.keywords_version, self.data_read_at)
+        table.save(FEATURE_TABLE_PATH)
         
-        return X, y
+        print(f"Feature table: {len(table.emails)} users x {len(table.columns)} features, "
+              f"{len(table.keywords)} skill keywords")
+        return table
     
-    def train(self, X_train, y_train):
+    def train(self, interactions):
         """
         Train model
-        Tim ML dapat implement model mereka di sini
+        
+        Args:
+            interactions: (weights, emails, course_ids) from prepare_features
         """
         print("Training model...")
         
-        # TODO: Implement model training
-        # Contoh:
-        # from sklearn.ensemble import RandomForestClassifier
-        # self.model = RandomForestClassifier()
-        # self.model.fit(X_train, y_train)
+        weights, emails, course_ids = interactions
+        als = ImplicitALS(**self.params).fit(weights)
+        self.model = ALSModel(als.user_factors, als.item_factors, emails, course_ids,
+                              als.regularization, als.alpha, self.data_read_at)
         
         print("Model training completed!")
         return self.model
     
-    def evaluate(self, X_test, y_test):
+    def search(self, data, grid=None, n_trials=None, workers=SEARCH_WORKERS, k=10):
+        """
+        Hyperparameter search on a validation split
+        
+        The most recent course of every user is held out first and never seen
+        by the search: it stays reserved for evaluate / --gate. Trials are
+        scored on the second most recent course (leave-last-out of the
+        remaining rows), so the gate does not compare on data the params
+        were tuned on.
+        
+        Every parameter set in the grid (or a random sample of n_trials) is
+        trained and ranked in a process pool; the interaction matrix is shared
+        with the workers as a memory-mapped artifact. The best params replace
+        self.params, so train / save_model use them. Per-trial metrics and
+        timings are written to ml/results/.
+        
+        Args:
+            data: Preprocessed progress rows
+            grid: dict of param -> values (default: hyperparameter_search.SEARCH_GRID)
+            n_trials: Random sample size (default: full grid)
+            workers: Worker processes
+            k: Cutoff of the NDCG used to pick the best params
+        
+        Returns:
+            Best params, or None if there is nothing to hold out
+        """
+        print("Searching hyperparameters...")
+        
+        # Same holdout as evaluate; the search only sees its training rows
+        holdout = EvaluationSplit.leave_last_out(data, self.course_ids_by_name)
+        validation = EvaluationSplit.leave_last_out(holdout.train, self.course_ids_by_name)
+        if validation.test.empty:
+            print("Not enough history to hold out a validation interaction!")
+            return None
+        
+        self.search_results = run_search(validation, self.course_ids_by_name, parameter_trials(grid, n_trials),
+                                         self.params, k, workers=workers)
+        best, metric = self.search_results['best'], self.search_results['metric']
+        self.params = dict(best['params'])
+        print(f"Best params: {self.params} ({metric}={best['metrics'][metric]:.4f})")
+        
+        results_path = os.path.join(os.path.dirname(__file__), '../results')
+        os.makedirs(results_path, exist_ok=True)
+        filepath = os.path.join(results_path, f"search_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+        with open(filepath, 'w') as f:
+            json.dump(self.search_results, f, indent=2)
+        print(f"Search results saved to {filepath}")
+        
+        return self.params
+    
+    def evaluate(self, data, k=10):
         """
         Evaluate model performance
+        
+        Holds out every user's most recent course, trains a model with the
+        current params on the rest and ranks all held-out users with both the
+        ML model and the rule-based recommender (evaluation.py). Results are
+        printed, kept in self.evaluation and written to ml/results/.
+        
+        Args:
+            data: Preprocessed progress rows
+            k: Cutoff for precision@k, recall@k, MAP and NDCG
+        
+        Returns:
+            {'ml': metrics, 'rule_based': metrics}
         """
         print("Evaluating model...")
         
-        if self.model is None:
-            print("Model not trained yet!")
+        split = EvaluationSplit.leave_last_out(data, self.course_ids_by_name)
+        if split.test.empty:
+            print("Not enough history to hold out any interaction!")
             return None
         
-        # TODO: Implement evaluation metrics
-        # from sklearn.metrics import accuracy_score, precision_score, recall_score
-        # predictions = self.model.predict(X_test)
-        # accuracy = accuracy_score(y_test, predictions)
-        # print(f"Accuracy: {accuracy}")
+        weights, emails, course_ids = build_interaction_matrix(split.train, self.course_ids_by_name)
+        als = ImplicitALS(**self.params).fit(weights)
+        model = ALSModel(als.user_factors, als.item_factors, emails, course_ids, als.regularization, als.alpha)
+        
+        preferences_by_email = {}
+        if collections.get('users') is not None:
+            for user in collections['users'].find({}, {'_id': 0, 'email': 1, 'preferences': 1}):
+                preferences_by_email[user.get('email')] = user.get('preferences') or {}
+        
+        self.evaluation = compare_engines(model, split, get_recommender().state, self.course_ids_by_name,
+                                          k, preferences_by_email)
         
-        return None
+        for engine, metrics in self.evaluation.items():
+            print(f"  {engine:<11} " + "  ".join(f"{name}={value:.4f}" for name, value in metrics.items()
+                                                   if '@' in name) + f"  ({metrics['users']} users)")
+        
+        results_path = os.path.join(os.path.dirname(__file__), '../results')
+        os.makedirs(results_path, exist_ok=True)
+        filepath = os.path.join(results_path, f"evaluation_{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json")
+        with open(filepath, 'w') as f:
+            json.dump({'params': self.params, 'k': k, 'results': self.evaluation}, f, indent=2)
+        print(f"Evaluation saved to {filepath}")
+        
+        return self.evaluation
     
-    def save_model(self, filename='recommender_model.pkl'):
+    def save_model(self, version=None, activate=True):
         """
-        Save trained model ke file
+        Publish trained model ke model registry (ml/models/versions/<version>)
+        
+        Args:
+            version: Version name (default: UTC timestamp)
+            activate: Serve it right away; otherwise it becomes the shadow
+                CANDIDATE and is promoted later with manage_models.py
         """
         if self.model is None:
             print("No model to save!")
             return
         
-        os.makedirs(self.model_path, exist_ok=True)
-        model_file = os.path.join(self.model_path, filename)
-        
-        with open(model_file, 'wb') as f:
-            pickle.dump(self.model, f)
-        
-        print(f"Model saved to {model_file}")
+        registry = ModelRegistry(self.model_path)
+        metadata = {'params': self.params}
+        if self.evaluation is not None:
+            metadata['evaluation'] = self.evaluation
+        if self.search_results is not None:
+            metadata['search'] = {
+                'metric': self.search_results['metric'],
+                'trials': len(self.search_results['trials']),
+                'best': self.search_results['best']['metrics']
+            }
+        self.version = registry.publish(self.model, metadata=metadata, version=version, activate=activate)
+        if not activate:
+            registry.set_candidate(self.version)
+        
+        print(f"Model saved as version {self.version} ({'current' if activate else 'candidate'})")
     
-    def load_model(self, filename='recommender_model.pkl'):
+    def load_model(self, version=None):
         """
-        Load trained model dari file
+        Load trained model dari registry (default: current version)
         """
-        model_file = os.path.join(self.model_path, filename)
+        version, model = ModelRegistry(self.model_path).load(version)
         
-        if not os.path.exists(model_file):
-            print(f"Model file not found: {model_file}")
+        if model is None:
+            print("No current model version!")
             return None
         
-        with open(model_file, 'rb') as f:
-            self.model = pickle.load(f)
+        self.model, self.version = model, version
         
-        print(f"Model loaded from {model_file}")
+        print(f"Model version {version} loaded")
         return self.model
     
-    def run_training_pipeline(self):
+    def run_training_pipeline(self, version=None, activate=True, evaluate=False, gate=False,
+                              search=False, n_trials=None, workers=SEARCH_WORKERS):
         """
         Run complete training pipeline
+        
+        Args:
+            version, activate: See save_model
+            search: Pick params with a hyperparameter search first
+            n_trials, workers: See search
+            evaluate: Run the holdout evaluation before training on all data
+            gate: Evaluate, and only serve the new model if its NDCG is at
+                least the rule-based one (otherwise it becomes the candidate)
         """
         print("=" * 50)
         print("Starting Training Pipeline")
@@ -169,25 +310,32 @@ class ModelTrainer:
         processed_data = self.preprocess_data(data)
         
         # 3. Prepare features
-        X, y = self.prepare_features(processed_data)
+        interactions = self.prepare_features(processed_data)
         
-        if y is None:
-            print("Target variable not defined!")
+        if interactions[0].nnz == 0:
+            print("No interactions match a course in the catalog!")
             return
         
-        # 4. Split data
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
+        # 4. Hyperparameter search (optional), then evaluate on a holdout split (optional)
+        if search:
+            self.search(processed_data, n_trials=n_trials, workers=workers)
+        
+        if evaluate or gate:
+            results = self.evaluate(processed_data)
+            if gate and activate and results is not None:
+                ndcg = next(name for name in results['ml'] if name.startswith('ndcg@'))
+                if results['ml'][ndcg] < results['rule_based'][ndcg]:
+                    print(f"ML {ndcg} below rule-based, publishing as candidate only")
+                    activate = False
         
         # 5. Train
-        self.train(X_train, y_train)
+        self.train(interactions)
         
-        # 6. Evaluate
-        self.evaluate(X_test, y_test)
+        # 6. Save model
+        self.save_model(version, activate)
         
-        # 7. Save model
-        self.save_model()
+        # 7. Feature table for inference lookups
+        self.build_feature_table(processed_data)
         
         print("=" * 50)
         print("Training Pipeline Completed!")
@@ -195,6 +343,22 @@ class ModelTrainer:
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Train and publish the recommendation model')
+    parser.add_argument('--version', help='Version name (default: UTC timestamp)')
+    parser.add_argument('--candidate', action='store_true',
+                        help='Publish as shadow candidate instead of serving it right away')
+    parser.add_argument('--evaluate', action='store_true',
+                        help='Compare ML and rule-based rankings on a leave-last-out split first')
+    parser.add_argument('--gate', action='store_true',
+                        help='Evaluate, and only serve the model if its NDCG beats rule-based')
+    parser.add_argument('--search', action='store_true',
+                        help='Pick ALS params with a parallel search on a leave-last-out split first')
+    parser.add_argument('--trials', type=int, help='Random sample of this many grid combinations')
+    parser.add_argument('--workers', type=int, default=SEARCH_WORKERS, help='Search worker processes')
+    args = parser.parse_args()
+    
     trainer = ModelTrainer()
-    trainer.run_training_pipeline()
+    trainer.run_training_pipeline(args.version, activate=not args.candidate,
+                                  evaluate=args.evaluate, gate=args.gate,
+                                  search=args.search, n_trials=args.trials, workers=args.workers)
 
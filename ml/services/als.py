@@ -0,0 +1,379 @@
+"""
+Implicit-feedback ALS (Hu, Koren & Volinsky 2008) untuk collaborative filtering
+Semua operasi memakai sparse matrix (SciPy) dan dense BLAS (NumPy), sehingga
+training jutaan baris student_progress cukup di satu mesin CPU.
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Add backend to path untuk format artifact yang sama dengan backend
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../backend'))
+from services.artifacts import save_artifact, load_artifact
+
+ALS_ARTIFACT_KIND = 'als_model'
+
+# Users solved together per conjugate gradient batch
+CG_BATCH_SIZE = 4096
+
+# Floats of per-interaction outer products fold_in_batch holds at once
+FOLD_IN_CHUNK_FLOATS = 1 << 22
+
+
+def interaction_weights(progress_df):
+    """
+    Interaction strength per progress row: completion ratio plus exam score
+
+    Completion ratio is completed_tutorials / active_tutorials (clipped to
+    [0, 1]), exam_score (0-100) adds up to 1 more. Confidence used by ALS is
+    1 + alpha * weight.
+
+    Args:
+        progress_df: DataFrame with active_tutorials, completed_tutorials, exam_score
+
+    Returns:
+        float32 numpy array aligned with progress_df
+    """
+    def column(name):
+        if name not in progress_df:
+            return pd.Series(0.0, index=progress_df.index)
+        return pd.to_numeric(progress_df[name], errors='coerce').fillna(0.0)
+
+    completed = column('completed_tutorials')
+    active = column('active_tutorials').clip(lower=1)
+    ratio = (completed / active).clip(0.0, 1.0)
+    exam = (column('exam_score') / 100.0).clip(0.0, 1.0)
+
+    return (ratio + exam).to_numpy(dtype=np.float32)
+
+
+def build_interaction_matrix(progress_df, course_ids_by_name):
+    """
+    Build the sparse user x course weight matrix from student_progress rows
+
+    Rows whose course_name is not in the catalog are dropped. Duplicate
+    (user, course) rows keep the strongest interaction.
+
+    Args:
+        progress_df: DataFrame of student_progress documents
+        course_ids_by_name: dict of course_name -> course_id
+
+    Returns:
+        (weights csr_matrix, emails array, course_ids array); matrix rows follow
+        emails and columns follow course_ids
+    """
+    # Map names to positions in catalog_ids, so course ids keep their own dtype
+    catalog_ids = np.asarray(list(course_ids_by_name.values()))
+    positions = progress_df['course_name'].map(
+        {name: position for position, name in enumerate(course_ids_by_name)}
+    )
+    known = progress_df['email'].notna() & positions.notna()
+    df = pd.DataFrame({
+        'email': progress_df.loc[known, 'email'],
+        'course': positions[known].astype(np.int64),
+        'weight': interaction_weights(progress_df)[known.to_numpy()]
+    })
+    # observed=True: categorical emails (data_preprocessing.clean_data) group like strings
+    df = df.groupby(['email', 'course'], sort=False, observed=True, as_index=False)['weight'].max()
+
+    # Categorical emails keep every category of the source table, including
+    # users whose rows were all dropped above: no empty rows for them
+    users = pd.Categorical(df['email']).remove_unused_categories()
+    courses = pd.Categorical(df['course'])
+    weights = sparse.csr_matrix(
+        (df['weight'].to_numpy(dtype=np.float32), (users.codes, courses.codes)),
+        shape=(len(users.categories), len(courses.categories))
+    )
+
+    return weights, np.asarray(users.categories, dtype=object), catalog_ids[np.asarray(courses.categories)]
+
+
+class ImplicitALS:
+    """
+    Weighted matrix factorization for implicit feedback
+
+    Minimizes sum c_ui (p_ui - x_u . y_i)^2 + regularization (|X|^2 + |Y|^2)
+    with p_ui = 1 for every observed interaction and c_ui = 1 + alpha * weight.
+    Each half-step runs a few conjugate gradient iterations for a whole batch
+    of users (or items) at once, warm-started from the previous factors.
+    """
+
+    def __init__(self, factors=64, regularization=0.1, alpha=40.0, iterations=15,
+                 cg_steps=3, random_state=42):
+        self.factors = factors
+        self.regularization = regularization
+        self.alpha = alpha
+        self.iterations = iterations
+        self.cg_steps = cg_steps
+        self.random_state = random_state
+        self.user_factors = None
+        self.item_factors = None
+
+    def fit(self, weights):
+        """
+        Train on a user x item weight matrix
+
+        Args:
+            weights: scipy sparse matrix of interaction weights (see interaction_weights)
+
+        Returns:
+            self
+        """
+        # Only c_ui - 1 is stored; unobserved entries have confidence 1
+        confidence = sparse.csr_matrix(weights, dtype=np.float32, copy=True)
+        confidence.data *= self.alpha
+        confidence_t = confidence.T.tocsr()
+
+        rng = np.random.default_rng(self.random_state)
+        n_users, n_items = confidence.shape
+        self.user_factors = rng.normal(0, 0.01, (n_users, self.factors)).astype(np.float32)
+        self.item_factors = rng.normal(0, 0.01, (n_items, self.factors)).astype(np.float32)
+
+        for _ in range(self.iterations):
+            self.user_factors = self._solve(confidence, self.item_factors, self.user_factors)
+            self.item_factors = self._solve(confidence_t, self.user_factors, self.item_factors)
+
+        return self
+
+    def _solve(self, confidence, fixed, current):
+        """
+        Update every row of `current` against the `fixed` factors
+
+        Row u solves (F'F + F'(C_u - I)F + reg*I) x_u = F' C_u p_u.
+        """
+        gram = fixed.T @ fixed + self.regularization * np.eye(self.factors, dtype=np.float32)
+        solved = current.copy()
+
+        for start in range(0, confidence.shape[0], CG_BATCH_SIZE):
+            rows = confidence[start:start + CG_BATCH_SIZE]
+            row_of_entry = np.repeat(np.arange(rows.shape[0]), np.diff(rows.indptr))
+            entry_factors = fixed[rows.indices]
+
+            def apply(v):
+                # (F'F + reg*I) v + F'(C_u - I)F v, for every row at once
+                dots = np.einsum('ij,ij->i', entry_factors, v[row_of_entry])
+                weighted = sparse.csr_matrix((rows.data * dots, rows.indices, rows.indptr), shape=rows.shape)
+                return v @ gram + weighted @ fixed
+
+            # F' C_u p_u, with C_u = 1 + stored value on observed entries
+            targets = sparse.csr_matrix((rows.data + 1.0, rows.indices, rows.indptr), shape=rows.shape)
+            x = solved[start:start + CG_BATCH_SIZE]
+            r = targets @ fixed - apply(x)
+            p = r.copy()
+            rs_old = np.einsum('ij,ij->i', r, r)
+
+            for _ in range(self.cg_steps):
+                ap = apply(p)
+                denominator = np.einsum('ij,ij->i', p, ap)
+                step = np.divide(rs_old, denominator, out=np.zeros_like(rs_old), where=denominator > 0)
+                x += step[:, None] * p
+                r -= step[:, None] * ap
+                rs_new = np.einsum('ij,ij->i', r, r)
+                beta = np.divide(rs_new, rs_old, out=np.zeros_like(rs_new), where=rs_old > 0)
+                p = r + beta[:, None] * p
+                rs_old = rs_new
+
+            solved[start:start + CG_BATCH_SIZE] = x
+
+        return solved
+
+
+class ALSModel:
+    """
+    Trained factors plus the id mappings needed to serve them
+
+    Items are course_ids, users are emails, in the row order of the factor
+    matrices. Emails are kept sorted as UTF-8 bytes, so a user is found with a
+    binary search on the (memory-mapped) array instead of a per-process dict.
+    """
+
+    def __init__(self, user_factors, item_factors, emails, course_ids, regularization, alpha,
+                 trained_through=None):
+        """
+        Args:
+            user_factors: (n_users, factors) array, rows in emails order
+            item_factors: (n_courses, factors) array, rows in course_ids order
+            emails: Emails as str (sorted here) or sorted UTF-8 bytes
+            course_ids: Course ids of the item rows
+            regularization: ImplicitALS regularization (used by fold_in)
+            alpha: ImplicitALS confidence scale (used by fold_in)
+            trained_through: ISO timestamp the training data was read at;
+                progress stamped later is not in the stored user rows
+        """
+        emails = np.asarray(emails)
+        if emails.dtype.kind != 'S':
+            emails = np.char.encode(emails.astype(str), 'utf-8')
+            order = np.argsort(emails, kind='stable')
+            if np.any(order != np.arange(len(order))):
+                emails = emails[order]
+                user_factors = user_factors[order]
+
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.emails = emails
+        self.course_ids = course_ids
+        self.regularization = regularization
+        self.alpha = alpha
+        self.trained_through = trained_through
+        self.course_index = {course_id: column for column, course_id in enumerate(course_ids.tolist())}
+        self.item_gram = np.asarray(item_factors.T @ item_factors)
+
+    @classmethod
+    def train(cls, progress_df, course_ids_by_name, **params):
+        """
+        Build the interaction matrix and fit ImplicitALS
+
+        Args:
+            progress_df: DataFrame of student_progress documents
+            course_ids_by_name: dict of course_name -> course_id
+            **params: ImplicitALS hyperparameters
+        """
+        weights, emails, course_ids = build_interaction_matrix(progress_df, course_ids_by_name)
+        als = ImplicitALS(**params).fit(weights)
+        return cls(als.user_factors, als.item_factors, emails, course_ids, als.regularization, als.alpha)
+
+    def save(self, directory, metadata=None):
+        """
+        Save as .npy arrays plus manifest.json
+
+        Args:
+            directory: Artifact directory (replaced if it exists)
+            metadata: Extra manifest metadata (training data stats, metrics, ...)
+        """
+        return save_artifact(
+            directory,
+            ALS_ARTIFACT_KIND,
+            {
+                'user_factors': self.user_factors,
+                'item_factors': self.item_factors,
+                'emails': self.emails,
+                'course_ids': self.course_ids
+            },
+            dict(
+                metadata or {},
+                factors=int(self.item_factors.shape[1]),
+                regularization=self.regularization,
+                alpha=self.alpha,
+                trained_through=self.trained_through,
+                users=int(self.user_factors.shape[0]),
+                courses=int(self.item_factors.shape[0])
+            )
+        )
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Load a saved model; factor matrices are memory-mapped read-only by default"""
+        manifest, arrays = load_artifact(directory, ALS_ARTIFACT_KIND, mmap=mmap)
+        metadata = manifest['metadata']
+        return cls(
+            arrays['user_factors'],
+            arrays['item_factors'],
+            arrays['emails'],
+            arrays['course_ids'],
+            metadata['regularization'],
+            metadata['alpha'],
+            metadata.get('trained_through')
+        )
+
+    def user_row(self, email):
+        """Row of a user in user_factors, or None if the user is not in the model"""
+        if not email:
+            return None
+        key = email.encode('utf-8')
+        row = int(np.searchsorted(self.emails, key))
+        if row < len(self.emails) and self.emails[row] == key:
+            return row
+        return None
+
+    def user_rows(self, emails):
+        """Rows of many users in user_factors (-1 for users not in the model)"""
+        keys = np.char.encode(np.asarray(emails, dtype=str), 'utf-8')
+        if len(self.emails) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        rows = np.searchsorted(self.emails, keys)
+        found = (self.emails[np.minimum(rows, len(self.emails) - 1)] == keys) & (keys != b'')
+        return np.where(found, rows, -1)
+
+    def fold_in(self, course_ids, weights):
+        """
+        Compute the factor vector of a user that is not in the model
+
+        Exact least squares against the frozen item factors, the same
+        equation ALS solves for every user during training.
+
+        Args:
+            course_ids: Courses the user interacted with
+            weights: Interaction weights aligned with course_ids
+
+        Returns:
+            float32 vector of length factors
+        """
+        # A course counts once, with its strongest weight (as in build_interaction_matrix)
+        weight_by_column = {}
+        for course_id, weight in zip(course_ids, weights):
+            column = self.course_index.get(course_id)
+            if column is not None:
+                weight_by_column[column] = max(weight, weight_by_column.get(column, weight))
+
+        n_factors = self.item_factors.shape[1]
+        if not weight_by_column:
+            return np.zeros(n_factors, dtype=np.float32)
+
+        observed = self.item_factors[list(weight_by_column)]
+        confidence = self.alpha * np.fromiter(weight_by_column.values(), dtype=np.float32)
+        lhs = (self.item_gram + (observed.T * confidence) @ observed
+               + self.regularization * np.eye(n_factors, dtype=np.float32))
+        rhs = observed.T @ (confidence + 1.0)
+        return np.linalg.solve(lhs, rhs).astype(np.float32)
+
+    def fold_in_batch(self, users, columns, weights, n_users):
+        """
+        fold_in for many users at once, with one batched linear solve
+
+        Memory is the n_users x factors x factors systems plus a bounded chunk
+        of per-interaction outer products (FOLD_IN_CHUNK_FLOATS), however
+        many interactions a single user has.
+
+        Args:
+            users: Output row (0..n_users-1) of every interaction
+            columns: Item column of every interaction
+            weights: Interaction weight of every interaction
+            n_users: Number of output rows
+
+        Returns:
+            (n_users, factors) float32 array
+        """
+        n_factors = self.item_factors.shape[1]
+        n_items = self.item_factors.shape[0]
+
+        # One entry per (user, column), with its strongest weight (as in build_interaction_matrix)
+        users = np.asarray(users, dtype=np.int64)
+        columns = np.asarray(columns, dtype=np.int64)
+        weights = np.asarray(weights, dtype=np.float32)
+        keys = users * n_items + columns
+        order = np.lexsort((weights, keys))
+        last = np.ones(len(order), dtype=bool)
+        last[:-1] = keys[order][1:] != keys[order][:-1]
+        order = order[last]
+        users, columns = users[order], columns[order]
+        confidence = self.alpha * weights[order]
+
+        # Per user: item_gram + sum c y y' + reg*I, and sum (c + 1) y.
+        # Entries are sorted by user, so the outer products of each chunk are
+        # summed per user with reduceat.
+        lhs = np.broadcast_to(
+            self.item_gram + self.regularization * np.eye(n_factors, dtype=np.float32),
+            (n_users, n_factors, n_factors)
+        ).copy()
+        chunk = max(1, FOLD_IN_CHUNK_FLOATS // (n_factors * n_factors))
+        for start in range(0, len(users), chunk):
+            chunk_users = users[start:start + chunk]
+            observed = self.item_factors[columns[start:start + chunk]]
+            outer = (observed * confidence[start:start + chunk, None])[:, :, None] * observed[:, None, :]
+            starts = np.flatnonzero(np.r_[True, chunk_users[1:] != chunk_users[:-1]])
+            lhs[chunk_users[starts]] += np.add.reduceat(outer, starts)
+        rhs = sparse.csr_matrix((confidence + 1.0, (users, columns)), shape=(n_users, n_items)) @ self.item_factors
+
+        return np.linalg.solve(lhs, rhs[:, :, None])[:, :, 0].astype(np.float32)
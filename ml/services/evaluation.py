@@ -0,0 +1,269 @@
+"""
+Offline ranking evaluation untuk rule-based dan ML recommender
+Split student_progress (leave-last-out atau berdasarkan waktu), ranking semua
+test user per batch, lalu hitung precision@k, recall@k, MAP dan NDCG dengan
+operasi matrix NumPy. Kedua engine dinilai atas split, katalog dan mask yang
+sama, sehingga hasilnya bisa dibandingkan langsung.
+"""
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from features import build_user_features
+
+# Test users ranked per matrix product
+EVAL_BATCH_SIZE = 4096
+
+
+class EvaluationSplit:
+    """
+    Train / test progress rows
+
+    Each test row is one held-out (email, course) interaction. Train rows of
+    the same (email, course) pair are removed so duplicates do not leak.
+    """
+
+    def __init__(self, train, test):
+        self.train = train
+        self.test = test
+
+    @classmethod
+    def leave_last_out(cls, progress_df, course_ids_by_name, min_history=2):
+        """
+        Hold out the most recent catalog course of every user with at least
+        min_history catalog courses
+
+        Recency is updated_at; rows without it count as older, in stored order.
+        """
+        df = cls._catalog_rows(progress_df, course_ids_by_name)
+        if 'updated_at' in df:
+            df = df.sort_values('updated_at', kind='stable', na_position='first')
+        position = df.groupby('email', sort=False).cumcount(ascending=False)
+        history = df.groupby('email', sort=False)['email'].transform('size')
+        held_out = (position == 0) & (history >= min_history)
+        return cls._from_mask(df, held_out.to_numpy())
+
+    @classmethod
+    def by_time(cls, progress_df, course_ids_by_name, cutoff):
+        """
+        Hold out every interaction stamped at or after cutoff (ISO timestamp),
+        for users that also have earlier interactions
+        """
+        df = cls._catalog_rows(progress_df, course_ids_by_name)
+        stamps = df['updated_at'] if 'updated_at' in df else pd.Series(np.nan, index=df.index)
+        after = (stamps >= cutoff).fillna(False).astype(bool)
+        has_history = (~after).groupby(df['email']).transform('any')
+        return cls._from_mask(df, (after & has_history).to_numpy())
+
+    @staticmethod
+    def _catalog_rows(progress_df, course_ids_by_name):
+        known = progress_df['email'].notna() & progress_df['course_name'].isin(course_ids_by_name.keys())
+        return progress_df[known].reset_index(drop=True)
+
+    @classmethod
+    def _from_mask(cls, df, held_out):
+        test = df[held_out]
+        pairs = pd.MultiIndex.from_frame(df[['email', 'course_name']])
+        test_pairs = pd.MultiIndex.from_frame(test[['email', 'course_name']])
+        train = df[~pairs.isin(test_pairs)]
+        return cls(train.reset_index(drop=True), test.reset_index(drop=True))
+
+    @property
+    def test_users(self):
+        """Emails of the users with held-out interactions, in first-seen order"""
+        return self.test['email'].drop_duplicates().to_numpy(dtype=str)
+
+
+def ranking_metrics(top, valid, relevant, k):
+    """
+    Per-user ranking metrics, computed for all users at once
+
+    Args:
+        top: (n_users, k) recommended item columns, best first
+        valid: (n_users, k) bool, False where fewer than k items were recommended
+        relevant: (n_users, n_items) bool matrix of held-out items
+        k: Cutoff
+
+    Returns:
+        dict of metric -> (n_users,) array
+    """
+    rows = np.arange(top.shape[0])[:, None]
+    hits = relevant[rows, top] & valid
+    n_relevant = relevant.sum(axis=1)
+    ranks = np.arange(1, k + 1)
+
+    hit_counts = hits.sum(axis=1)
+    precision_at = np.cumsum(hits, axis=1) / ranks
+    discounts = 1.0 / np.log2(ranks + 1)
+    ideal = np.cumsum(discounts)[np.clip(np.minimum(n_relevant, k) - 1, 0, None)]
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return {
+            'precision': hit_counts / k,
+            'recall': np.where(n_relevant > 0, hit_counts / n_relevant, 0.0),
+            'map': np.where(n_relevant > 0, (precision_at * hits).sum(axis=1) / np.minimum(n_relevant, k), 0.0),
+            'ndcg': np.where(n_relevant > 0, (hits * discounts).sum(axis=1) / ideal, 0.0)
+        }
+
+
+def evaluate_scorer(score_users, split, catalog, course_ids_by_name, k=10, batch_size=EVAL_BATCH_SIZE):
+    """
+    Rank every test user with score_users and average the metrics
+
+    Courses in a user's training history are excluded, and only positive
+    scores count as recommendations (as both engines serve them).
+
+    Args:
+        score_users: Function emails -> (n_users, n_courses) scores in
+            catalog.courses order
+        split: EvaluationSplit
+        catalog: CatalogSnapshot defining the course positions
+        course_ids_by_name: dict of course_name -> course_id used for the split
+        k: Cutoff
+
+    Returns:
+        dict of 'precision@k', 'recall@k', 'map@k', 'ndcg@k', 'users', 'coverage'
+    """
+    position_by_id = {}
+    for position, course in enumerate(catalog.courses):
+        position_by_id.setdefault(course.get('course_id'), position)
+    position_by_name = {
+        name: position_by_id[course_id]
+        for name, course_id in course_ids_by_name.items()
+        if course_id in position_by_id
+    }
+
+    users = split.test_users
+    user_index = pd.Index(users)
+    n_courses = len(catalog.courses)
+
+    def incidence(rows):
+        # users x catalog positions, for the test users only
+        rows = rows[rows['email'].isin(user_index) & rows['course_name'].isin(position_by_name.keys())]
+        return sparse.csr_matrix(
+            (np.ones(len(rows), dtype=bool),
+             (user_index.get_indexer(rows['email']), rows['course_name'].map(position_by_name).to_numpy())),
+            shape=(len(users), n_courses)
+        )
+
+    return summarize_rankings(score_users, users, incidence(split.train), incidence(split.test), k, batch_size)
+
+
+def summarize_rankings(score_users, users, taken, relevant, k=10, batch_size=EVAL_BATCH_SIZE):
+    """
+    Rank users in batches and average their ranking metrics
+
+    Args:
+        score_users: Function users[chunk] -> (n_chunk, n_items) scores
+        users: Array of users, passed to score_users in chunks
+        taken: (n_users, n_items) sparse bool matrix of items to exclude
+        relevant: (n_users, n_items) sparse bool matrix of held-out items
+        k: Cutoff
+
+    Returns:
+        dict of 'precision@k', 'recall@k', 'map@k', 'ndcg@k', 'users', 'coverage'
+    """
+    totals = {'precision': 0.0, 'recall': 0.0, 'map': 0.0, 'ndcg': 0.0}
+    covered = 0
+    k = min(k, relevant.shape[1])
+    for start in range(0, len(users), batch_size):
+        chunk = slice(start, start + batch_size)
+        scores = np.asarray(score_users(users[chunk]), dtype=np.float64)
+        scores[taken[chunk].toarray()] = -np.inf
+
+        # Stable sort: ties keep catalog order, as in scoring.top_k
+        top = np.argsort(-scores, axis=1, kind='stable')[:, :k]
+        valid = np.take_along_axis(scores, top, axis=1) > 0
+
+        metrics = ranking_metrics(top, valid, relevant[chunk].toarray(), k)
+        for name in totals:
+            totals[name] += metrics[name].sum()
+        covered += int(valid[:, 0].sum()) if k else 0
+
+    n_users = max(len(users), 1)
+    result = {f'{name}@{k}': round(float(total) / n_users, 6) for name, total in totals.items()}
+    result['users'] = int(len(users))
+    result['coverage'] = round(covered / n_users, 6)
+    return result
+
+
+def rule_based_scorer(state, train_progress, preferences_by_email=None):
+    """
+    score_users for the rule-based RecommenderService
+
+    Skill histograms of all users come from one build_user_features pass
+    over the training rows and are scored with VectorScorer.score_vectors,
+    the same scorer RecommenderService ranks with.
+
+    Args:
+        state: RecommenderState (scorer, skill_matcher)
+        train_progress: Training progress rows
+        preferences_by_email: Optional dict of email -> preferences
+    """
+    scorer = state.scorer
+    table = build_user_features(train_progress, state.skill_matcher)
+    preferences_by_email = preferences_by_email or {}
+
+    def score_users(emails):
+        rows = table.rows(emails)
+        known = rows >= 0
+        weak = np.zeros((len(emails), len(scorer.skills)))
+        completed = np.zeros((len(emails), len(scorer.skills)))
+        weak[known] = table.weak_skills[rows[known]]
+        completed[known] = table.completed_skills[rows[known]] > 0
+        preferred = np.array(
+            [scorer.preferred_lp_code(preferences_by_email.get(email) or {}) for email in emails],
+            dtype=np.int64
+        )
+        return scorer.score_vectors(weak, completed, completed.sum(axis=1) == 0, preferred)
+
+    return score_users
+
+
+def als_scorer(model, catalog):
+    """
+    score_users for an ALSModel (trained on the training rows only)
+
+    Users outside the model get no recommendations.
+    """
+    position_by_id = {}
+    for position, course in enumerate(catalog.courses):
+        position_by_id.setdefault(course.get('course_id'), position)
+    columns = np.array(
+        [position_by_id.get(course_id, -1) for course_id in model.course_ids.tolist()],
+        dtype=np.int64
+    )
+    in_catalog = columns >= 0
+
+    def score_users(emails):
+        rows = model.user_rows(emails)
+        known = rows >= 0
+        scores = np.full((len(emails), len(catalog.courses)), -np.inf)
+        user_scores = model.user_factors[rows[known]] @ model.item_factors[in_catalog].T
+        scores[np.ix_(np.flatnonzero(known), columns[in_catalog])] = user_scores
+        return scores
+
+    return score_users
+
+
+def compare_engines(model, split, state, course_ids_by_name, k=10, preferences_by_email=None):
+    """
+    Evaluate the ML model and the rule-based recommender on the same split
+
+    Args:
+        model: ALSModel trained on split.train only
+        split: EvaluationSplit
+        state: RecommenderState of the rule-based recommender
+        course_ids_by_name: dict of course_name -> course_id used for the split
+        k: Cutoff
+        preferences_by_email: Optional dict of email -> preferences (rule-based bonus)
+
+    Returns:
+        {'ml': metrics, 'rule_based': metrics}
+    """
+    return {
+        'ml': evaluate_scorer(als_scorer(model, state.catalog), split, state.catalog, course_ids_by_name, k),
+        'rule_based': evaluate_scorer(
+            rule_based_scorer(state, split.train, preferences_by_email),
+            split, state.catalog, course_ids_by_name, k
+        )
+    }
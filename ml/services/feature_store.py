@@ -0,0 +1,272 @@
+"""
+Parquet export dan incremental feature store untuk data training
+Collections di-stream dari MongoDB per batch ke Parquet. student_progress
+disimpan sebagai feature store yang di-refresh secara incremental: hanya
+dokumen dengan updated_at setelah watermark run sebelumnya yang diambil dan
+di-merge ke tabel yang sudah ada.
+"""
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+from itertools import islice
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Add backend to path untuk akses database
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../backend'))
+from db import collections
+from services.catalog import get_progress_generation
+
+RAW_DATA_PATH = os.path.join(os.path.dirname(__file__), '../data/raw')
+FEATURE_STORE_PATH = os.getenv(
+    'ML_FEATURE_STORE_PATH',
+    os.path.join(os.path.dirname(__file__), '../data/feature_store')
+)
+
+# Documents per cursor batch / Parquet row group
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 50000))
+
+# Incremental refreshes re-read this much before the watermark, so writes that
+# were stamped before but committed after the previous run are not missed
+WATERMARK_OVERLAP_SECONDS = int(os.getenv('FEATURE_STORE_WATERMARK_OVERLAP_SECONDS', 300))
+
+# Exported fields per collection: 'string' or 'number' (float64, NaN if missing)
+EXPORT_SCHEMAS = {
+    'student_progress': {
+        'name': 'string',
+        'email': 'string',
+        'course_name': 'string',
+        'active_tutorials': 'number',
+        'completed_tutorials': 'number',
+        'is_graduated': 'number',
+        'already_generated_certificate': 'number',
+        'final_submission_id': 'number',
+        'submission_rating': 'number',
+        'final_exam_id': 'number',
+        'exam_score': 'number',
+        'updated_at': 'string'
+    },
+    'courses': {
+        'course_id': 'number',
+        'learning_path_id': 'number',
+        'course_name': 'string',
+        'course_level_str': 'string',
+        'hours_to_study': 'number'
+    },
+    'learning_paths': {
+        'learning_path_id': 'number',
+        'learning_path_name': 'string'
+    },
+    'skill_keywords': {
+        'id': 'number',
+        'keyword': 'string'
+    },
+    'tutorials': {
+        'tutorial_id': 'number',
+        'course_id': 'number'
+    },
+    'course_levels': {
+        'id': 'number',
+        'course_level': 'string'
+    }
+}
+
+# A student_progress row is identified by (email, course_name), as in /api/progress/update
+PROGRESS_KEY = ['email', 'course_name']
+
+
+def _arrow_schema(schema):
+    return pa.schema([
+        (column, pa.string() if kind == 'string' else pa.float64())
+        for column, kind in schema.items()
+    ])
+
+
+def _chunk_to_arrow(documents, schema, arrow_schema):
+    """Convert one batch of documents to a typed Arrow table"""
+    df = pd.DataFrame.from_records(documents, columns=list(schema))
+    for column, kind in schema.items():
+        if kind == 'string':
+            df[column] = df[column].astype('string')
+        else:
+            df[column] = pd.to_numeric(df[column], errors='coerce').astype('float64')
+    return pa.Table.from_pandas(df, schema=arrow_schema, preserve_index=False)
+
+
+def export_collection(name, path=None, query=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Stream a MongoDB collection into a Parquet file
+
+    Reads with a batched cursor and a projection of the EXPORT_SCHEMAS fields,
+    converts each batch to typed columns and appends it as a row group, so
+    only one batch is held in memory regardless of collection size.
+
+    Args:
+        name: Collection name (key of EXPORT_SCHEMAS)
+        path: Output file (default: data/raw/<name>.parquet)
+        query: Optional MongoDB filter
+        batch_size: Documents per batch
+
+    Returns:
+        (path, number of rows written)
+    """
+    schema = EXPORT_SCHEMAS[name]
+    arrow_schema = _arrow_schema(schema)
+    path = path or os.path.join(RAW_DATA_PATH, f'{name}.parquet')
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    cursor = collections[name].find(
+        query or {},
+        dict({'_id': 0}, **{column: 1 for column in schema})
+    ).batch_size(batch_size)
+
+    # Written next to the target and renamed, so readers never see a partial file
+    tmp_path = f"{path}.tmp-{os.getpid()}"
+    rows = 0
+    with pq.ParquetWriter(tmp_path, arrow_schema) as writer:
+        while True:
+            documents = list(islice(cursor, batch_size))
+            if not documents:
+                break
+            writer.write_table(_chunk_to_arrow(documents, schema, arrow_schema))
+            rows += len(documents)
+    os.replace(tmp_path, path)
+
+    return path, rows
+
+
+class FeatureStore:
+    """
+    student_progress as a Parquet table kept in sync incrementally
+
+    Layout di root (default ml/data/feature_store):
+
+        student_progress.parquet   all progress rows, sorted by email
+        state.json                 watermark (max updated_at seen) and stats
+
+    Rows are sorted by email and written in row groups, so reading the
+    progress of a set of users only touches the row groups that hold them.
+    Progress rows are never deleted by the API. A bulk re-import
+    (import_excel_to_mongo.py) bumps the student_progress generation in
+    catalog_meta, and the next refresh after that is a full export.
+    """
+
+    def __init__(self, root=FEATURE_STORE_PATH, batch_size=EXPORT_BATCH_SIZE):
+        self.root = os.path.abspath(root)
+        self.batch_size = batch_size
+        self.progress_path = os.path.join(self.root, 'student_progress.parquet')
+        self.state_path = os.path.join(self.root, 'state.json')
+
+    def read_state(self):
+        """Stored refresh state, or None if the store was never built"""
+        if not os.path.exists(self.progress_path):
+            return None
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def refresh(self, full=False):
+        """
+        Bring the store up to date with MongoDB
+
+        Pulls only documents with updated_at >= watermark - overlap and
+        replaces their (email, course_name) rows in the stored table. Falls
+        back to a full export when there is no usable state or watermark, or
+        when the collection was replaced since the store was built (its
+        generation changed).
+
+        Args:
+            full: Re-export the whole collection
+
+        Returns:
+            dict with mode, rows pulled, total rows and watermark
+        """
+        state = self.read_state()
+        watermark = state.get('watermark') if state else None
+        os.makedirs(self.root, exist_ok=True)
+        started = datetime.utcnow().isoformat()
+
+        # Read before exporting: a re-import during the export forces the next run to be full
+        generation = get_progress_generation()
+        if state and state.get('generation', 0) != generation:
+            full = True
+
+        if full or watermark is None:
+            mode = 'full'
+            path, pulled = export_collection('student_progress', f'{self.progress_path}.export',
+                                             batch_size=self.batch_size)
+            progress = pd.read_parquet(path)
+        else:
+            mode = 'incremental'
+            since = (datetime.fromisoformat(watermark) - timedelta(seconds=WATERMARK_OVERLAP_SECONDS)).isoformat()
+            path, pulled = export_collection('student_progress', f'{self.progress_path}.changes',
+                                             query={'updated_at': {'$gte': since}}, batch_size=self.batch_size)
+            changes = pd.read_parquet(path)
+            progress = pd.read_parquet(self.progress_path)
+            if len(changes):
+                # Changed rows replace every stored row with the same key
+                changed_keys = pd.MultiIndex.from_frame(changes[PROGRESS_KEY].fillna(''))
+                stored_keys = pd.MultiIndex.from_frame(progress[PROGRESS_KEY].fillna(''))
+                progress = pd.concat([progress[~stored_keys.isin(changed_keys)], changes], ignore_index=True)
+        os.remove(path)
+
+        if mode == 'full' or pulled:
+            self._write_progress(progress)
+
+        # Documents without updated_at (written before the watermark existed)
+        # are only picked up by full refreshes
+        latest = progress['updated_at'].max() if len(progress) else None
+        if pd.isna(latest):
+            # Nothing stamped yet: the next run pulls everything stamped from now on
+            latest = started
+        watermark = max(filter(None, [watermark, latest]))
+
+        state = {
+            'watermark': watermark,
+            'generation': generation,
+            'rows': len(progress),
+            'last_refresh': started,
+            'last_mode': mode,
+            'last_pulled': pulled
+        }
+        tmp_state = f"{self.state_path}.tmp-{os.getpid()}"
+        with open(tmp_state, 'w') as f:
+            json.dump(state, f, indent=2)
+        os.replace(tmp_state, self.state_path)
+
+        return {'mode': mode, 'pulled': pulled, 'rows': len(progress), 'watermark': watermark}
+
+    def _write_progress(self, progress):
+        progress = progress.sort_values('email', kind='stable', ignore_index=True)
+        table = pa.Table.from_pandas(progress, schema=_arrow_schema(EXPORT_SCHEMAS['student_progress']),
+                                     preserve_index=False)
+        tmp_path = f"{self.progress_path}.tmp-{os.getpid()}"
+        pq.write_table(table, tmp_path, row_group_size=self.batch_size)
+        os.replace(tmp_path, self.progress_path)
+
+    def load_progress(self, emails=None, columns=None):
+        """
+        Read progress rows from the store
+
+        Args:
+            emails: Only these users (row groups without them are skipped)
+            columns: Only these columns
+
+        Returns:
+            DataFrame of student_progress rows
+        """
+        filters = [('email', 'in', list(emails))] if emails is not None else None
+        return pd.read_parquet(self.progress_path, columns=columns, filters=filters)
+
+    def progress_by_email(self, emails):
+        """Progress documents of many users, as /api/progress returns them"""
+        progress = self.load_progress(emails)
+        progress = progress.astype(object).where(progress.notna(), None)
+        progress_by_email = {}
+        for record in progress.to_dict('records'):
+            progress_by_email.setdefault(record['email'], []).append(record)
+        return progress_by_email
@@ -0,0 +1,249 @@
+"""
+Per-user feature table dari student_progress
+Semua user dihitung sekaligus (groupby / bincount atas kode email), lalu
+disimpan sebagai tabel kolumnar (.npy per kolom + manifest.json) supaya
+inference per request cukup lookup satu baris.
+"""
+import os
+import sys
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+# Add backend to path untuk format artifact yang sama dengan backend
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../backend'))
+from services.artifacts import ArtifactStore, save_artifact, load_artifact
+
+FEATURE_TABLE_ARTIFACT_KIND = 'user_features'
+FEATURE_TABLE_PATH = os.getenv(
+    'ML_FEATURE_TABLE_PATH',
+    os.path.join(os.path.dirname(__file__), '../models/user_features')
+)
+FEATURE_TABLE_CHECK_SECONDS = int(os.getenv('ML_FEATURE_TABLE_CHECK_SECONDS', 30))
+
+# Scalar feature columns, in table order
+FEATURE_COLUMNS = (
+    'total_courses',
+    'completed_courses',
+    'total_tutorials',
+    'completed_tutorials',
+    'completion_rate',
+    'exam_count',
+    'exam_score_mean',
+    'exam_score_max',
+    'submission_count',
+    'submission_rating_mean',
+    'submission_rating_max'
+)
+
+
+def _numeric(progress_df, name):
+    """Column as float64, NaN where missing or not a number"""
+    if name not in progress_df:
+        return np.full(len(progress_df), np.nan)
+    # na_value: nullable columns (boolean flags of data_preprocessing.clean_data) hold <NA>
+    return pd.to_numeric(progress_df[name], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _score_stats(codes, values, n_users):
+    """Count, mean and max of the non-missing values per user (NaN mean/max if none)"""
+    present = ~np.isnan(values)
+    count = np.bincount(codes[present], minlength=n_users)
+    total = np.bincount(codes[present], weights=values[present], minlength=n_users)
+    maximum = np.full(n_users, -np.inf)
+    np.maximum.at(maximum, codes[present], values[present])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    maximum[count == 0] = np.nan
+    return count, mean, maximum
+
+
+def build_user_features(progress_df, skill_matcher, keywords_version=None, built_through=None):
+    """
+    Compute the feature table for every user in progress_df in one pass
+
+    Skill histograms follow the rule-based skill profile: completed_skills
+    counts graduated courses per keyword, weak_skills courses that are not
+    graduated and less than 50% complete. A null is_graduated (NaN here) is
+    neither, as a None value is in RecommenderService.
+
+    Args:
+        progress_df: DataFrame of student_progress documents
+        skill_matcher: SkillMatcher of the keyword set to count
+        keywords_version: Version of that keyword set, stored with the table
+        built_through: ISO timestamp progress_df was read at, stored with the table
+
+    Returns:
+        UserFeatureTable
+    """
+    progress_df = progress_df.reindex(columns=progress_df.columns.union(['email', 'course_name'], sort=False))
+    progress_df = progress_df[progress_df['email'].notna()]
+    codes, emails = pd.factorize(progress_df['email'].astype(str))
+    n_users = len(emails)
+
+    active = np.nan_to_num(_numeric(progress_df, 'active_tutorials'))
+    completed = np.nan_to_num(_numeric(progress_df, 'completed_tutorials'))
+    graduated = _numeric(progress_df, 'is_graduated')
+    ratio = completed / np.maximum(active, 1)
+
+    columns = {
+        'total_courses': np.bincount(codes, minlength=n_users),
+        'completed_courses': np.bincount(codes, weights=graduated == 1, minlength=n_users),
+        'total_tutorials': np.bincount(codes, weights=active + completed, minlength=n_users),
+        'completed_tutorials': np.bincount(codes, weights=completed, minlength=n_users)
+    }
+    with np.errstate(invalid='ignore', divide='ignore'):
+        columns['completion_rate'] = np.bincount(codes, weights=ratio, minlength=n_users) / columns['total_courses']
+    (columns['exam_count'], columns['exam_score_mean'],
+     columns['exam_score_max']) = _score_stats(codes, _numeric(progress_df, 'exam_score'), n_users)
+    (columns['submission_count'], columns['submission_rating_mean'],
+     columns['submission_rating_max']) = _score_stats(codes, _numeric(progress_df, 'submission_rating'), n_users)
+
+    # Skill keywords of each distinct course name, matched once per name
+    name_codes, unique_names = pd.factorize(progress_df['course_name'].fillna('').astype(str))
+    keywords = list(skill_matcher.keywords)
+    keyword_index = {keyword: column for column, keyword in enumerate(keywords)}
+    name_rows, keyword_columns, multiplicity = [], [], []
+    for row, name in enumerate(unique_names):
+        for keyword in skill_matcher.match(name):
+            name_rows.append(row)
+            keyword_columns.append(keyword_index[keyword])
+            multiplicity.append(skill_matcher.multiplicity[keyword])
+    name_skills = sparse.csr_matrix(
+        (np.asarray(multiplicity, dtype=np.float64), (name_rows, keyword_columns)),
+        shape=(len(unique_names), len(keywords))
+    )
+
+    def histogram(mask):
+        # users x names counts of the masked rows, times names x keywords
+        user_names = sparse.csr_matrix(
+            (np.ones(int(mask.sum())), (codes[mask], name_codes[mask])),
+            shape=(n_users, len(unique_names))
+        )
+        return (user_names @ name_skills).toarray().astype(np.int32)
+
+    return UserFeatureTable(
+        np.asarray(emails, dtype=str),
+        {name: np.asarray(columns[name], dtype=np.float32) for name in FEATURE_COLUMNS},
+        np.asarray(keywords, dtype=str),
+        histogram(graduated == 1),
+        histogram((graduated == 0) & (ratio < 0.5)),
+        keywords_version,
+        built_through
+    )
+
+
+class UserFeatureTable:
+    """
+    Columnar per-user features
+
+    One float32 array per scalar feature and one users x keywords matrix per
+    skill histogram, rows in emails order. Emails are kept sorted as UTF-8
+    bytes, so a row is found with a binary search (as in ALSModel).
+    """
+
+    def __init__(self, emails, columns, keywords, completed_skills, weak_skills, keywords_version=None,
+                 built_through=None):
+        emails = np.asarray(emails)
+        if emails.dtype.kind != 'S':
+            emails = np.char.encode(emails.astype(str), 'utf-8')
+            order = np.argsort(emails, kind='stable')
+            if np.any(order != np.arange(len(order))):
+                emails = emails[order]
+                columns = {name: values[order] for name, values in columns.items()}
+                completed_skills = completed_skills[order]
+                weak_skills = weak_skills[order]
+
+        self.emails = emails
+        self.columns = columns
+        self.keywords = keywords
+        self.completed_skills = completed_skills
+        self.weak_skills = weak_skills
+        self.keywords_version = keywords_version
+        # Progress stamped after this is not in the table
+        self.built_through = built_through
+
+    def save(self, directory):
+        """Save as .npy columns plus manifest.json"""
+        arrays = {f'column_{name}': values for name, values in self.columns.items()}
+        arrays.update({
+            'emails': self.emails,
+            'keywords': self.keywords,
+            'completed_skills': self.completed_skills,
+            'weak_skills': self.weak_skills
+        })
+        return save_artifact(
+            directory,
+            FEATURE_TABLE_ARTIFACT_KIND,
+            arrays,
+            {
+                'columns': list(self.columns),
+                'keywords_version': self.keywords_version,
+                'built_through': self.built_through,
+                'users': len(self.emails)
+            }
+        )
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Load a saved table; columns are memory-mapped read-only by default"""
+        manifest, arrays = load_artifact(directory, FEATURE_TABLE_ARTIFACT_KIND, mmap=mmap)
+        metadata = manifest['metadata']
+        return cls(
+            arrays['emails'],
+            {name: arrays[f'column_{name}'] for name in metadata['columns']},
+            arrays['keywords'],
+            arrays['completed_skills'],
+            arrays['weak_skills'],
+            metadata.get('keywords_version'),
+            metadata.get('built_through')
+        )
+
+    def rows(self, emails):
+        """Rows of many users (-1 for users not in the table)"""
+        keys = np.char.encode(np.asarray(emails, dtype=str), 'utf-8')
+        if len(self.emails) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        rows = np.searchsorted(self.emails, keys)
+        found = self.emails[np.minimum(rows, len(self.emails) - 1)] == keys
+        return np.where(found, rows, -1)
+
+    def row(self, email):
+        """
+        Features of one user
+
+        Returns:
+            dict of feature -> value, plus completed_skills / weak_skills dicts
+            of keyword -> count; None if the user is not in the table
+        """
+        row = int(self.rows([email])[0]) if email else -1
+        if row < 0:
+            return None
+        return self.row_at(row)
+
+    def row_at(self, row):
+        """Features of the user at row (see row)"""
+        features = {name: float(values[row]) for name, values in self.columns.items()}
+        for name, histogram in (('completed_skills', self.completed_skills), ('weak_skills', self.weak_skills)):
+            counts = np.asarray(histogram[row])
+            features[name] = {
+                str(self.keywords[column]): int(counts[column]) for column in np.flatnonzero(counts)
+            }
+        return features
+
+    def frame(self):
+        """Scalar features as a DataFrame indexed by email"""
+        return pd.DataFrame(
+            {name: np.asarray(values) for name, values in self.columns.items()},
+            index=pd.Index(np.char.decode(self.emails, 'utf-8'), name='email')
+        )
+
+
+class FeatureTableStore(ArtifactStore):
+    """Process-wide holder of the current UserFeatureTable"""
+
+    def __init__(self, path=FEATURE_TABLE_PATH, check_interval=FEATURE_TABLE_CHECK_SECONDS):
+        super().__init__(path, UserFeatureTable.load, check_interval, 'user feature table')
+
+
+feature_table_store = FeatureTableStore()
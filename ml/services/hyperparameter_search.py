@@ -0,0 +1,208 @@
+"""
+Parallel hyperparameter search untuk ImplicitALS
+Setiap trial melatih model pada training split dan meranking test user dengan
+metrics dari evaluation.py. Interaction matrix (dan mask test user) ditulis
+sekali sebagai artifact .npy; worker process me-map file yang sama
+(mmap_mode='r') sehingga matrix tidak di-pickle ke setiap worker.
+
+Tip: set OMP_NUM_THREADS / OPENBLAS_NUM_THREADS=1 saat menjalankan banyak
+worker, supaya BLAS threads tidak saling berebut core.
+"""
+import itertools
+import os
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from als import ImplicitALS, build_interaction_matrix
+from evaluation import summarize_rankings
+
+# Add backend to path untuk format artifact yang sama dengan backend
+sys.path.append(os.path.join(os.path.dirname(__file__), '../../backend'))
+from services.artifacts import save_artifact, load_artifact
+
+SEARCH_ARTIFACT_KIND = 'search_interactions'
+
+# Default search space (full grid: 27 trials)
+SEARCH_GRID = {
+    'factors': [32, 64, 128],
+    'regularization': [0.01, 0.1, 1.0],
+    'iterations': [10, 15, 25]
+}
+
+SEARCH_WORKERS = int(os.getenv('ML_SEARCH_WORKERS', os.cpu_count() or 1))
+
+# Shared arrays of the current worker process, set by _init_worker
+_shared = {}
+
+
+def parameter_trials(grid=None, n_trials=None, random_state=42):
+    """
+    Parameter combinations to try
+
+    Args:
+        grid: dict of param -> list of values (default: SEARCH_GRID)
+        n_trials: Random sample of this many combinations (default: full grid)
+        random_state: Seed of the random sample
+
+    Returns:
+        list of param dicts
+    """
+    grid = grid or SEARCH_GRID
+    names = list(grid)
+    trials = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    if n_trials is not None and n_trials < len(trials):
+        picked = np.random.default_rng(random_state).choice(len(trials), size=n_trials, replace=False)
+        trials = [trials[index] for index in sorted(picked)]
+    return trials
+
+
+def _share_split(directory, split, course_ids_by_name):
+    """
+    Write the training matrix and the test user masks as one artifact
+
+    Columns are the courses of the training matrix followed by courses that
+    only occur in the test rows (never recommendable, but they count as
+    relevant). Test users without training rows get row -1.
+    """
+    weights, emails, course_ids = build_interaction_matrix(split.train, course_ids_by_name)
+    column_by_id = {course_id: column for column, course_id in enumerate(course_ids.tolist())}
+    for course_id in split.test['course_name'].map(course_ids_by_name).drop_duplicates().tolist():
+        column_by_id.setdefault(course_id, len(column_by_id))
+
+    users = split.test_users
+    user_index = pd.Index(users)
+    rows = pd.Index(emails).get_indexer(users)
+
+    def incidence(progress):
+        progress = progress[progress['email'].isin(user_index)]
+        return sparse.csr_matrix(
+            (np.ones(len(progress), dtype=bool),
+             (user_index.get_indexer(progress['email']),
+              progress['course_name'].map(course_ids_by_name).map(column_by_id).to_numpy())),
+            shape=(len(users), len(column_by_id))
+        )
+
+    taken = incidence(split.train)
+    relevant = incidence(split.test)
+    save_artifact(
+        directory,
+        SEARCH_ARTIFACT_KIND,
+        {
+            'weights_data': weights.data,
+            'weights_indices': weights.indices,
+            'weights_indptr': weights.indptr,
+            'test_rows': rows,
+            'taken_indices': taken.indices,
+            'taken_indptr': taken.indptr,
+            'relevant_indices': relevant.indices,
+            'relevant_indptr': relevant.indptr
+        },
+        {'users': weights.shape[0], 'items': weights.shape[1], 'columns': len(column_by_id)}
+    )
+    return weights.shape
+
+
+def _init_worker(directory):
+    """Map the shared arrays once per worker process"""
+    manifest, arrays = load_artifact(directory, SEARCH_ARTIFACT_KIND, mmap=True)
+    metadata = manifest['metadata']
+    n_test = len(arrays['test_rows'])
+
+    def mask(name):
+        indices = arrays[f'{name}_indices']
+        return sparse.csr_matrix(
+            (np.ones(len(indices), dtype=bool), indices, arrays[f'{name}_indptr']),
+            shape=(n_test, metadata['columns'])
+        )
+
+    _shared.update({
+        'weights': sparse.csr_matrix(
+            (arrays['weights_data'], arrays['weights_indices'], arrays['weights_indptr']),
+            shape=(metadata['users'], metadata['items'])
+        ),
+        'test_rows': arrays['test_rows'],
+        'taken': mask('taken'),
+        'relevant': mask('relevant'),
+        'columns': metadata['columns']
+    })
+
+
+def _run_trial(params, k):
+    """Fit one parameter set on the shared matrix and score the test users"""
+    started = time.perf_counter()
+    als = ImplicitALS(**params).fit(_shared['weights'])
+    fit_seconds = time.perf_counter() - started
+
+    n_items = als.item_factors.shape[0]
+
+    def score_users(rows):
+        # Users without training rows (and test-only courses) score 0: never recommended
+        scores = np.zeros((len(rows), _shared['columns']), dtype=np.float32)
+        known = rows >= 0
+        scores[known, :n_items] = als.user_factors[rows[known]] @ als.item_factors.T
+        return scores
+
+    started = time.perf_counter()
+    metrics = summarize_rankings(score_users, _shared['test_rows'], _shared['taken'], _shared['relevant'], k)
+    eval_seconds = time.perf_counter() - started
+
+    return {
+        'params': params,
+        'metrics': metrics,
+        'fit_seconds': round(fit_seconds, 3),
+        'eval_seconds': round(eval_seconds, 3),
+        'worker': os.getpid()
+    }
+
+
+def run_search(split, course_ids_by_name, trials, base_params=None, k=10, metric='ndcg',
+               workers=SEARCH_WORKERS):
+    """
+    Evaluate every parameter set in trials across a process pool
+
+    Args:
+        split: EvaluationSplit (models are fit on split.train)
+        course_ids_by_name: dict of course_name -> course_id
+        trials: list of param dicts (see parameter_trials)
+        base_params: ImplicitALS params not set by a trial
+        k: Cutoff
+        metric: Metric to rank trials by ('precision', 'recall', 'map', 'ndcg')
+        workers: Worker processes
+
+    Returns:
+        dict with metric, trials (best first, with timings) and best
+    """
+    directory = tempfile.mkdtemp(prefix='als-search-')
+    try:
+        users, items = _share_split(os.path.join(directory, 'shared'), split, course_ids_by_name)
+        print(f"Search: {len(trials)} trials on {users} users x {items} courses, {workers} workers")
+
+        results = []
+        started = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=max(1, min(workers, len(trials))), initializer=_init_worker,
+                                 initargs=(os.path.join(directory, 'shared'),)) as pool:
+            futures = [pool.submit(_run_trial, dict(base_params or {}, **params), k) for params in trials]
+            for future in as_completed(futures):
+                result = future.result()
+                results.append(result)
+                print(f"  trial {len(results)}/{len(trials)}: {result['params']} "
+                      f"{metric}@{k}={result['metrics'][f'{metric}@{k}']:.4f} ({result['fit_seconds']:.1f}s)")
+        wall_seconds = time.perf_counter() - started
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    name = f'{metric}@{k}'
+    results.sort(key=lambda result: result['metrics'][name], reverse=True)
+    return {
+        'metric': name,
+        'k': k,
+        'workers': workers,
+        'wall_seconds': round(wall_seconds, 3),
+        'trials': results,
+        'best': results[0] if results else None
+    }
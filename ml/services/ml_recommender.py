@@ -1,52 +1,160 @@
 """
 ML-based Recommender Service
-Template untuk tim ML - implementasikan model recommendation di sini
+Collaborative filtering (implicit ALS) atas interaksi user x course dari student_progress
 """
 import os
 import sys
-import pickle
+import time
+import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pandas as pd
 
 # Add backend to path untuk akses database
 sys.path.append(os.path.join(os.path.dirname(__file__), '../../backend'))
 from db import collections
+from services.catalog import catalog_store
+from services.recommender import get_recommender
+from services.scoring import render_reason, REASON_SIMILAR_LEARNERS, REASON_SIMILAR_COURSE
+from services.similar_courses import similar_courses_store
+from als import ALSModel, interaction_weights
+from model_registry import ModelRegistry
+from features import build_user_features, feature_table_store
+from evaluation import compare_engines
+
+# Number of courses returned per user
+ML_TOP_K = 10
+
+# Users outside the model with fewer courses than this get item-item candidates
+COLD_START_MAX_COURSES = int(os.getenv('ML_COLD_START_MAX_COURSES', 3))
+
+# How often the registry pointers are checked for a new version
+MODEL_CHECK_SECONDS = int(os.getenv('ML_MODEL_CHECK_SECONDS', 30))
+
+# Fraction of requests also scored with the CANDIDATE version (0 disables shadow mode)
+SHADOW_SAMPLE_RATE = float(os.getenv('ML_SHADOW_SAMPLE_RATE', 0.0))
+
+# Shadow scorings allowed to wait at once; further samples are dropped
+SHADOW_MAX_PENDING = 4
+
+# Folded-in vectors of recently updated users kept per process
+USER_VECTOR_CACHE_SIZE = int(os.getenv('ML_USER_VECTOR_CACHE_SIZE', 10000))
 
 class MLRecommenderService:
     """
     ML-based recommendation service
-    Tim ML dapat implementasikan model mereka di sini
+    Scores every course with the dot product of user and course factors of an ALSModel
+    
+    By default the model comes from the ModelRegistry: the version CURRENT
+    points at is served, and moving the pointer swaps in the new version
+    in-process without dropping requests.
+    
+    Users whose progress changed after the model's training data was read
+    get their vector folded in from current progress instead of the stored
+    row, so new completions count without a retrain.
     """
     
-    def __init__(self, model_path=None):
+    def __init__(self, model_path=None, registry=None):
         """
         Initialize ML recommender
         
         Args:
-            model_path: Path ke trained model file (.pkl, .joblib, dll)
+            model_path: Path ke trained model directory (.npy arrays + manifest.json);
+                serves that fixed directory instead of the registry
+            registry: ModelRegistry to serve from (default: ml/models)
         """
         self.model = None
-        self.model_path = model_path or os.path.join(
-            os.path.dirname(__file__),
-            '../models/recommender_model.pkl'
-        )
+        self.model_version = None
+        self.shadow_model = None
+        self.shadow_version = None
+        self.shadow_sample_rate = SHADOW_SAMPLE_RATE
+        self.shadow_stats = {'samples': 0, 'overlap': 0.0, 'top1_match': 0,
+                             'latency_ms': 0.0, 'shadow_latency_ms': 0.0}
+        self._catalog_lookups = {}
+        self._user_vectors = OrderedDict()
+        self._user_vectors_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._last_check = 0.0
+        self._shadow_executor = None
+        self._shadow_slots = threading.Semaphore(SHADOW_MAX_PENDING)
+        self.model_path = model_path
+        self.registry = None if model_path else (registry or ModelRegistry())
         
-        # Load model jika ada
-        if os.path.exists(self.model_path):
+        if self.registry is not None:
+            self.refresh(force=True)
+        elif os.path.exists(self.model_path):
+            # Load model jika ada
             self.load_model()
     
+    def refresh(self, force=False):
+        """
+        Swap in the versions the registry pointers name, if they changed
+        
+        Checked at most every MODEL_CHECK_SECONDS. A new version is fully
+        loaded and warmed before the swap; requests already running keep the
+        model they started with. If another thread is already refreshing this
+        returns immediately, so requests never wait on a load.
+        
+        Args:
+            force: Check now regardless of the interval
+        """
+        if self.registry is None:
+            return
+        now = time.time()
+        if not force and now - self._last_check < MODEL_CHECK_SECONDS:
+            return
+        if not self._lock.acquire(blocking=False):
+            return
+        
+        try:
+            self._last_check = now
+            current = self.registry.current_version()
+            if current is not None and current != self.model_version:
+                model = self._load_version(current)
+                if model is not None:
+                    self.model, self.model_version = model, current
+                    self._clear_user_vectors()
+                    print(f"Model version {current} loaded")
+            
+            candidate = self.registry.candidate_version() if self.shadow_sample_rate > 0 else None
+            if candidate == self.model_version:
+                candidate = None
+            if candidate != self.shadow_version:
+                model = self._load_version(candidate) if candidate is not None else None
+                if candidate is None or model is not None:
+                    self.shadow_model, self.shadow_version = model, candidate
+                    print(f"Shadow model version: {candidate}")
+        finally:
+            self._lock.release()
+    
+    def _load_version(self, version):
+        """Load and warm a registry version; None (and the old model kept) on failure"""
+        try:
+            _, model = self.registry.load(version)
+            self._get_catalog_lookup(model, catalog_store.get())
+            return model
+        except Exception as e:
+            print(f"[ERROR] Loading model version {version} failed: {e}")
+            return None
+    
     def load_model(self, model_path=None):
         """
-        Load trained model dari file
+        Load trained model dari directory
+        
+        Factor matrices are memory-mapped, so worker processes share them
+        through the page cache instead of each holding a copy.
         
         Args:
-            model_path: Path ke model file (optional)
+            model_path: Path ke model directory (optional)
         """
         path = model_path or self.model_path
         
         try:
-            with open(path, 'rb') as f:
-                self.model = pickle.load(f)
+            self.model = ALSModel.load(path)
+            self.model_version = None
+            self._clear_user_vectors()
             print(f"Model loaded from {path}")
         except Exception as e:
             print(f"Error loading model: {e}")
@@ -54,50 +162,150 @@ class MLRecommenderService:
     
     def save_model(self, model, model_path=None):
         """
-        Save trained model ke file
+        Save trained model ke directory
+        
+        Without a path the model is published to the registry as a new
+        current version.
         
         Args:
-            model: Trained model object
+            model: Trained ALSModel
             model_path: Path untuk save model (optional)
         """
         path = model_path or self.model_path
         
-        # Create directory if not exists
-        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if path is None:
+            version = self.registry.publish(model)
+            self.refresh(force=True)
+            print(f"Model published as version {version}")
+            return
         
-        with open(path, 'wb') as f:
-            pickle.dump(model, f)
+        model.save(path)
         print(f"Model saved to {path}")
     
-    def prepare_features(self, user_email, user_progress, user_preferences):
+    def prepare_features(self, user_email, user_progress, user_preferences, model=None):
         """
         Prepare features untuk model prediction
-        Tim ML dapat customize method ini sesuai kebutuhan
+        
+        The feature vector is the user's factor vector: the trained row for
+        users in the model whose progress has not changed since training,
+        otherwise folded in from user_progress against the item factors.
+        Fold-ins of the served model are cached per (user, latest updated_at).
         
         Args:
             user_email: User email
             user_progress: List of progress documents
             user_preferences: User preferences dict
+            model: ALSModel to use (default: the served model)
         
         Returns:
-            Feature vector untuk model
-        """
-        # TODO: Implement feature engineering
-        # Contoh:
-        # - Extract skills from progress
-        # - Calculate completion rates
-        # - Encode preferences
-        # - Normalize features
-        
-        features = {
-            'total_courses': len(user_progress),
-            'completed_courses': sum(1 for p in user_progress if p.get('is_graduated', 0) == 1),
-            'total_tutorials': sum(p.get('active_tutorials', 0) + p.get('completed_tutorials', 0) for p in user_progress),
-            'completed_tutorials': sum(p.get('completed_tutorials', 0) for p in user_progress),
-        }
+            Factor vector (numpy array) untuk model
+        """
+        if model is None:
+            model = self.model
+        stamp = self._latest_update(user_progress)
+        row = model.user_row(user_email)
+        if row is not None and not self._is_newer(model.trained_through, stamp):
+            return model.user_factors[row]
+        
+        if not user_progress:
+            return np.zeros(model.item_factors.shape[1], dtype=np.float32)
+        
+        cached = self._user_vectors.get(user_email)
+        if cached is not None and cached[0] is model and cached[1] == stamp:
+            return cached[2]
+        
+        course_ids_by_name = self._get_catalog_lookup(model, catalog_store.get())['course_ids_by_name']
+        progress_df = pd.DataFrame(user_progress)
+        vector = model.fold_in(
+            [course_ids_by_name.get(name) for name in progress_df.get('course_name', [])],
+            interaction_weights(progress_df)
+        )
+        
+        # Only stamped progress identifies the state a vector was computed from
+        if stamp is not None and model is self.model:
+            with self._user_vectors_lock:
+                self._user_vectors[user_email] = (model, stamp, vector)
+                self._user_vectors.move_to_end(user_email)
+                while len(self._user_vectors) > USER_VECTOR_CACHE_SIZE:
+                    self._user_vectors.popitem(last=False)
+        return vector
+    
+    def _clear_user_vectors(self):
+        with self._user_vectors_lock:
+            self._user_vectors.clear()
+    
+    @staticmethod
+    def _latest_update(user_progress):
+        """Latest updated_at of the progress documents, or None if none is stamped"""
+        stamps = [p.get('updated_at') for p in user_progress or []]
+        stamps = [stamp for stamp in stamps if stamp]
+        return max(stamps) if stamps else None
+    
+    @staticmethod
+    def _is_newer(read_at, stamp):
+        """Whether progress stamped at stamp is missing from data read at read_at (model or feature table)"""
+        return stamp is not None and read_at is not None and stamp > read_at
+    
+    def get_user_features(self, user_email, user_progress=None):
+        """
+        Engineered features of one user (completion, exam / submission stats,
+        skill histograms)
+        
+        Looked up in the precomputed feature table; users missing from it,
+        with progress newer than it, or a table built with another skill
+        keyword set are computed from user_progress on the fly.
+        
+        Args:
+            user_email: User email
+            user_progress: The user's progress documents (loaded if not given)
+        
+        Returns:
+            dict of feature -> value (see features.FEATURE_COLUMNS) plus
+            completed_skills / weak_skills dicts, or None without data
+        """
+        if user_progress is None:
+            user_progress = self._load_progress([user_email]).get(user_email, [])
+        return self._user_features([user_email], [user_progress])[0]
+    
+    def _user_features(self, user_ids, progress):
+        """
+        get_user_features for many users: table rows where they are current,
+        one build_user_features pass over the progress of everyone else
         
+        Args:
+            user_ids: List of user emails
+            progress: List of progress document lists, aligned with user_ids
+        """
+        state = get_recommender().state
+        table = feature_table_store.get()
+        if table is not None and table.keywords_version != state.keywords_version:
+            table = None
+        rows = table.rows(user_ids) if table is not None else np.full(len(user_ids), -1)
+        
+        features = [None] * len(user_ids)
+        computed = []
+        for position, docs in enumerate(progress):
+            if rows[position] >= 0 and not self._is_newer(table.built_through, self._latest_update(docs)):
+                features[position] = table.row_at(int(rows[position]))
+            elif docs:
+                computed.append(position)
+        
+        if computed:
+            progress_df = pd.DataFrame(
+                [dict(doc, email=user_ids[position]) for position in computed for doc in progress[position]]
+            )
+            table = build_user_features(progress_df, state.skill_matcher)
+            for position in computed:
+                features[position] = table.row(user_ids[position])
         return features
     
+    def _skill_profiles(self, user_ids, progress):
+        """(completed_skills, weak_skills) per user, from _user_features"""
+        return [
+            (features['completed_skills'], features['weak_skills']) if features else ({}, {})
+            for features in self._user_features(user_ids, progress)
+        ]
+    
     def get_recommendations(self, user_email, user_progress, user_preferences):
         """
         Get recommendations menggunakan ML model
@@ -116,77 +324,337 @@ class MLRecommenderService:
                 'skill_analysis': {...}
             }
         """
-        if self.model is None:
+        self.refresh()
+        
+        # One model for the whole request, even if a swap happens meanwhile
+        model = self.model
+        if model is None:
             raise ValueError("Model not loaded. Please train and save model first.")
         
+        catalog = catalog_store.get()
+        completed_skills, weak_skills = self._skill_profiles([user_email], [user_progress])[0]
+        
+        started = time.perf_counter()
+        result = self._recommend(model, catalog, user_email, user_progress, user_preferences,
+                                 completed_skills, weak_skills)
+        latency = time.perf_counter() - started
+        
+        shadow_model = self.shadow_model
+        if shadow_model is not None and random.random() < self.shadow_sample_rate:
+            self._submit_shadow(shadow_model, result, latency, catalog, user_email, user_progress,
+                                user_preferences, completed_skills, weak_skills)
+        
+        return result
+    
+    def _recommend(self, model, catalog, user_email, user_progress, user_preferences,
+                   completed_skills, weak_skills):
+        """Rank courses for one user with one model"""
+        lookup = self._get_catalog_lookup(model, catalog)
+        
+        taken = [lookup['course_ids_by_name'].get(p.get('course_name')) for p in user_progress]
+        taken = [course_id for course_id in taken if course_id is not None]
+        
+        # Too little history for a useful fold-in: courses often taken together with the user's
+        if model.user_row(user_email) is None and len(taken) < COLD_START_MAX_COURSES:
+            index = similar_courses_store.get()
+            ranked = index.candidates(taken, exclude=taken, limit=ML_TOP_K) if index is not None else []
+            ranked = [(course_id, score) for course_id, score in ranked if course_id in catalog.courses_by_id]
+            if ranked:
+                return self._format_recommendations(catalog, ranked, REASON_SIMILAR_COURSE,
+                                                    completed_skills, weak_skills)
+        
         # Prepare features
-        features = self.prepare_features(user_email, user_progress, user_preferences)
+        user_vector = self.prepare_features(user_email, user_progress, user_preferences, model)
+        
+        # Predicted preference for every course in one matrix-vector product
+        scores = model.item_factors @ user_vector
+        scores[~lookup['servable']] = -np.inf
+        
+        # Do not recommend courses the user already has progress in
+        taken_columns = [model.course_index.get(course_id) for course_id in taken]
+        scores[[column for column in taken_columns if column is not None]] = -np.inf
+        
+        ranked = [(model.course_ids[column], scores[column]) for column in self._top_columns(scores, ML_TOP_K)]
+        return self._format_recommendations(catalog, ranked, REASON_SIMILAR_LEARNERS,
+                                            completed_skills, weak_skills)
+    
+    def recommend_batch(self, user_ids, k=ML_TOP_K, progress_by_email=None):
+        """
+        Get recommendations for many users at once
+        
+        Builds the factor matrix of all users (stored rows, plus one batched
+        fold-in solve for users outside the model or with progress newer than
+        it), scores it against the item
+        factors with a single matrix multiply and takes the top k per row with
+        argpartition. Results match get_recommendations per user. Memory is
+        len(user_ids) x courses floats, so callers pass chunks of users.
+        
+        Args:
+            user_ids: List of user emails
+            k: Courses per user
+            progress_by_email: dict of email -> progress documents (loaded with
+                one $in query if not given)
+        
+        Returns:
+            List of recommendation dicts (same format as get_recommendations),
+            in the same order as user_ids
+        """
+        self.refresh()
+        
+        model = self.model
+        if model is None:
+            raise ValueError("Model not loaded. Please train and save model first.")
+        
+        catalog = catalog_store.get()
+        lookup = self._get_catalog_lookup(model, catalog)
+        if progress_by_email is None:
+            progress_by_email = self._load_progress(user_ids)
+        progress = [progress_by_email.get(email) or [] for email in user_ids]
+        profiles = self._skill_profiles(list(user_ids), progress)
+        
+        # One row per progress document, tagged with the user's position in user_ids
+        progress_df = pd.DataFrame([doc for docs in progress for doc in docs])
+        progress_df['user'] = np.repeat(np.arange(len(user_ids)), [len(docs) for docs in progress])
+        if 'course_name' not in progress_df:
+            progress_df['course_name'] = None
+        in_catalog = progress_df['course_name'].isin(lookup['course_ids_by_name'].keys()).to_numpy()
+        columns = progress_df['course_name'].map(lookup['column_by_name'])
+        in_model = columns.notna().to_numpy()
+        
+        stored_rows = model.user_rows(user_ids)
+        
+        # Stored rows of users with progress newer than the training data are refolded
+        stale = np.zeros(len(user_ids), dtype=bool)
+        if model.trained_through is not None and 'updated_at' in progress_df:
+            newer = (progress_df['updated_at'].fillna('').astype(str) > model.trained_through).to_numpy()
+            stale[progress_df['user'].to_numpy()[newer]] = True
+        taken_counts = np.bincount(progress_df['user'].to_numpy()[in_catalog], minlength=len(user_ids))
+        
+        # Too little history for a useful fold-in: courses often taken together with the user's
+        results = [None] * len(user_ids)
+        cold = np.flatnonzero((stored_rows < 0) & (taken_counts < COLD_START_MAX_COURSES))
+        index = similar_courses_store.get() if len(cold) else None
+        if index is not None:
+            for position in cold:
+                taken = [lookup['course_ids_by_name'].get(p.get('course_name')) for p in progress[position]]
+                taken = [course_id for course_id in taken if course_id is not None]
+                ranked = index.candidates(taken, exclude=taken, limit=k)
+                ranked = [(course_id, score) for course_id, score in ranked if course_id in catalog.courses_by_id]
+                if ranked:
+                    results[position] = self._format_recommendations(
+                        catalog, ranked, REASON_SIMILAR_COURSE, *profiles[position]
+                    )
+        
+        # Factor matrix: trained rows, folded-in rows for everyone else
+        scored = np.array([result is None for result in results], dtype=bool)
+        user_vectors = np.zeros((len(user_ids), model.item_factors.shape[1]), dtype=np.float32)
+        known = scored & (stored_rows >= 0) & ~stale
+        user_vectors[known] = model.user_factors[stored_rows[known]]
         
-        # Get all courses
-        all_courses = []
-        if collections['courses']:
-            all_courses = list(collections['courses'].find({}, {'_id': 0}))
+        fold = scored & ((stored_rows < 0) | stale)
+        entries = fold[progress_df['user'].to_numpy()] & in_model
+        if entries.any():
+            fold_users, fold_rows = np.unique(progress_df['user'].to_numpy()[entries], return_inverse=True)
+            user_vectors[fold_users] = model.fold_in_batch(
+                fold_rows,
+                columns[entries].to_numpy(dtype=np.int64),
+                interaction_weights(progress_df)[entries],
+                len(fold_users)
+            )
         
-        # TODO: Implement ML prediction
-        # Contoh:
-        # predictions = self.model.predict(features)
-        # scores = self.model.predict_proba(features)
+        # Predicted preference of every user for every course in one product
+        scores = user_vectors @ model.item_factors.T
+        scores[:, ~lookup['servable']] = -np.inf
+        
+        # Do not recommend courses the user already has progress in
+        scores[progress_df['user'].to_numpy()[in_model], columns[in_model].to_numpy(dtype=np.int64)] = -np.inf
+        
+        top = self._top_columns_batch(scores, k)
+        for position in np.flatnonzero(scored):
+            best = top[position]
+            best = best[scores[position, best] > 0]
+            ranked = [(model.course_ids[column], scores[position, column]) for column in best.tolist()]
+            results[position] = self._format_recommendations(
+                catalog, ranked, REASON_SIMILAR_LEARNERS, *profiles[position]
+            )
+        
+        return results
+    
+    def _submit_shadow(self, model, result, latency, *request):
+        """Score a sampled request with the candidate model off the request thread"""
+        if not self._shadow_slots.acquire(blocking=False):
+            return
+        if self._shadow_executor is None:
+            self._shadow_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ml-shadow')
+        
+        future = self._shadow_executor.submit(self._score_shadow, model, result, latency, *request)
+        future.add_done_callback(lambda _: self._shadow_slots.release())
+    
+    def _score_shadow(self, model, result, latency, catalog, user_email, user_progress,
+                      user_preferences, completed_skills, weak_skills):
+        """
+        Compare the candidate model's ranking with the served one
         
-        # For now, return empty (tim ML akan implement)
+        Logs latency of both and overlap@k (shared courses over list length);
+        running means are kept in shadow_stats.
+        """
+        try:
+            started = time.perf_counter()
+            shadow_result = self._recommend(model, catalog, user_email, user_progress, user_preferences,
+                                            completed_skills, weak_skills)
+            shadow_latency = time.perf_counter() - started
+        except Exception as e:
+            print(f"[ERROR] Shadow scoring failed: {e}")
+            return
+        
+        served = [course['course_id'] for course in result['recommended_courses']]
+        shadowed = [course['course_id'] for course in shadow_result['recommended_courses']]
+        overlap = len(set(served) & set(shadowed)) / max(len(served), len(shadowed), 1)
+        top1_match = served[:1] == shadowed[:1]
+        
+        stats = self.shadow_stats
+        stats['samples'] += 1
+        stats['overlap'] += (overlap - stats['overlap']) / stats['samples']
+        stats['top1_match'] += int(top1_match)
+        stats['latency_ms'] += (latency * 1000 - stats['latency_ms']) / stats['samples']
+        stats['shadow_latency_ms'] += (shadow_latency * 1000 - stats['shadow_latency_ms']) / stats['samples']
+        
+        print(f"[SHADOW] {self.model_version} vs {self.shadow_version}: overlap@{ML_TOP_K}={overlap:.2f} "
+              f"top1={'same' if top1_match else 'diff'} latency={latency * 1000:.1f}ms/{shadow_latency * 1000:.1f}ms "
+              f"(mean overlap {stats['overlap']:.2f} over {stats['samples']} samples)")
+    
+    def _top_columns(self, scores, k):
+        """Columns of the k best positive scores, best first"""
+        k = min(k, len(scores))
+        if k <= 0:
+            return []
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best], kind='stable')]
+        return best[scores[best] > 0].tolist()
+    
+    def _top_columns_batch(self, scores, k):
+        """Columns of the k best scores per row, best first (not filtered on score)"""
+        k = min(k, scores.shape[1])
+        if k <= 0:
+            return np.empty((scores.shape[0], 0), dtype=np.int64)
+        best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, best, axis=1), axis=1, kind='stable')
+        return np.take_along_axis(best, order, axis=1)
+    
+    @staticmethod
+    def _load_progress(user_ids):
+        """Progress documents of many users with one $in query"""
+        progress_by_email = {}
+        if collections['student_progress'] is not None:
+            for progress in collections['student_progress'].find({'email': {'$in': list(user_ids)}}, {'_id': 0}):
+                progress_by_email.setdefault(progress.get('email'), []).append(progress)
+        return progress_by_email
+    
+    def _get_catalog_lookup(self, model, catalog):
+        """Course lookups between a model's course_ids and this catalog snapshot"""
+        cached = self._catalog_lookups.get(id(model))
+        if cached is not None and cached['model'] is model and cached['catalog'] is catalog:
+            return cached
+        
+        course_ids_by_name = {course.get('course_name'): course.get('course_id') for course in catalog.courses}
+        lookup = {
+            'model': model,
+            'catalog': catalog,
+            'course_ids_by_name': course_ids_by_name,
+            'column_by_name': {
+                name: model.course_index[course_id]
+                for name, course_id in course_ids_by_name.items()
+                if course_id in model.course_index
+            },
+            # Courses removed from the catalog since training are never returned
+            'servable': np.array(
+                [course_id in catalog.courses_by_id for course_id in model.course_ids.tolist()],
+                dtype=bool
+            )
+        }
+        # Keep lookups only for the served and shadow models
+        live = {id(model)} | {id(m) for m in (self.model, self.shadow_model) if m is not None}
+        lookups = {key: value for key, value in self._catalog_lookups.items() if key in live}
+        lookups[id(model)] = lookup
+        self._catalog_lookups = lookups
+        return lookup
+    
+    def _format_recommendations(self, catalog, ranked, reason_code, completed_skills, weak_skills):
+        """
+        Format response sesuai dengan rule-based
+        
+        Args:
+            catalog: CatalogSnapshot the course ids are resolved against
+            ranked: List of (course_id, score) pairs, best first
+            reason_code: Reason shown for every course
+        """
         recommended_courses = []
-        recommended_learning_paths = []
+        for course_id, score in ranked:
+            course = catalog.courses_by_id[course_id]
+            recommended_courses.append({
+                'course_id': course.get('course_id'),
+                'course_name': course.get('course_name'),
+                'learning_path_id': course.get('learning_path_id'),
+                'level': course.get('course_level_str'),
+                'hours': course.get('hours_to_study'),
+                'score': round(float(score), 4),
+                'reason': render_reason(reason_code),
+                'reason_code': reason_code,
+                'reason_skill': None
+            })
+        
+        lp_ids = {course['learning_path_id'] for course in recommended_courses if course['learning_path_id']}
+        recommended_learning_paths = [
+            {
+                'learning_path_id': lp_id,
+                'learning_path_name': lp_name
+            }
+            for lp_id, lp_name in catalog.learning_paths.items()
+            if lp_id in lp_ids
+        ]
         
-        # Format response sesuai dengan rule-based
         return {
             'recommended_courses': recommended_courses,
             'recommended_learning_paths': recommended_learning_paths,
             'skill_analysis': {
-                'completed_skills': [],
-                'weak_areas': []
-            }
+                'completed_skills': list(completed_skills.keys())[:10],
+                'weak_areas': list(weak_skills.keys())[:5]
+            },
+            'next_cursor': None
         }
     
-    def train(self, training_data):
+    def train(self, training_data, **params):
         """
         Train model menggunakan training data
-        Tim ML dapat implementasikan training logic di sini
         
         Args:
-            training_data: Training data (DataFrame atau dict)
+            training_data: DataFrame of student_progress documents
+            **params: ImplicitALS hyperparameters (factors, regularization, alpha, iterations, ...)
         """
-        # TODO: Implement model training
-        # Contoh:
-        # from sklearn.ensemble import RandomForestClassifier
-        # self.model = RandomForestClassifier()
-        # self.model.fit(X_train, y_train)
-        
         print("Training model...")
-        # Placeholder - tim ML akan implement
-        pass
+        catalog = catalog_store.get()
+        course_ids_by_name = {course.get('course_name'): course.get('course_id') for course in catalog.courses}
+        self.model = ALSModel.train(training_data, course_ids_by_name, **params)
+        print(f"Trained on {len(self.model.emails)} users x {len(self.model.course_ids)} courses")
     
-    def evaluate(self, test_data):
+    def evaluate(self, test_data, k=ML_TOP_K):
         """
         Evaluate model performance
-        Tim ML dapat implementasikan evaluation logic di sini
+        
+        Ranks every test user with the model and with the rule-based
+        recommender and computes precision@k, recall@k, MAP and NDCG for both
+        (see evaluation.py).
         
         Args:
-            test_data: Test data (DataFrame atau dict)
+            test_data: EvaluationSplit; the model must be trained on test_data.train only
+            k: Cutoff
         
         Returns:
-            Evaluation metrics (dict)
+            {'ml': metrics, 'rule_based': metrics}
         """
         if self.model is None:
             raise ValueError("Model not loaded")
         
-        # TODO: Implement evaluation
-        # Contoh:
-        # predictions = self.model.predict(X_test)
-        # accuracy = accuracy_score(y_test, predictions)
-        
-        return {
-            'accuracy': 0.0,
-            'precision': 0.0,
-            'recall': 0.0,
-            'f1_score': 0.0
-        }
-
+        state = get_recommender().state
+        course_ids_by_name = {course.get('course_name'): course.get('course_id') for course in state.catalog.courses}
+        return compare_engines(self.model, test_data, state, course_ids_by_name, k)
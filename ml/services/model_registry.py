@@ -0,0 +1,136 @@
+"""
+Local model registry: versioned model directories plus pointer files
+Layout di root (default ml/models):
+
+    versions/<version>/   one ALSModel artifact per trained version
+    CURRENT               name of the version served to users
+    CANDIDATE             optional version scored in shadow mode
+
+Pointers are replaced with os.replace, so a reader sees either the old or the
+new version name, never a partial write.
+"""
+import os
+import re
+from datetime import datetime
+from als import ALSModel
+
+MODEL_REGISTRY_PATH = os.getenv(
+    'ML_MODEL_REGISTRY_PATH',
+    os.path.join(os.path.dirname(__file__), '../models')
+)
+
+CURRENT_POINTER = 'CURRENT'
+CANDIDATE_POINTER = 'CANDIDATE'
+
+# Version names become directory names
+VERSION_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]*$')
+
+
+class ModelRegistry:
+    """
+    Publish, list and resolve model versions
+
+    Publishing never touches the version currently served: a new version is
+    written to its own directory and only becomes current when the pointer is
+    moved.
+    """
+
+    def __init__(self, root=MODEL_REGISTRY_PATH):
+        self.root = os.path.abspath(root)
+        self.versions_dir = os.path.join(self.root, 'versions')
+
+    def version_path(self, version):
+        """Directory of a version"""
+        if not VERSION_PATTERN.match(version or ''):
+            raise ValueError(f"Invalid model version name: {version!r}")
+        return os.path.join(self.versions_dir, version)
+
+    def list_versions(self):
+        """Published versions, oldest first"""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        return sorted(
+            name for name in os.listdir(self.versions_dir)
+            if VERSION_PATTERN.match(name) and os.path.isdir(os.path.join(self.versions_dir, name))
+        )
+
+    def publish(self, model, metadata=None, version=None, activate=True):
+        """
+        Save a trained model as a new version
+
+        Args:
+            model: Trained ALSModel
+            metadata: Extra manifest metadata (params, data stats, ...)
+            version: Version name (default: UTC timestamp)
+            activate: Point CURRENT at the new version; otherwise it is only
+                published and can be shadowed with set_candidate first
+
+        Returns:
+            Version name
+        """
+        version = version or datetime.utcnow().strftime('%Y%m%dT%H%M%S')
+        path = self.version_path(version)
+        if os.path.exists(path):
+            raise ValueError(f"Model version {version} already exists")
+
+        os.makedirs(self.versions_dir, exist_ok=True)
+        model.save(path, metadata=dict(metadata or {}, version=version))
+
+        if activate:
+            self.set_current(version)
+        return version
+
+    def current_version(self):
+        """Version CURRENT points at, or None"""
+        return self._read_pointer(CURRENT_POINTER)
+
+    def candidate_version(self):
+        """Version CANDIDATE points at, or None"""
+        return self._read_pointer(CANDIDATE_POINTER)
+
+    def set_current(self, version):
+        """Serve version (promote or roll back)"""
+        self._write_pointer(CURRENT_POINTER, version)
+
+    def set_candidate(self, version):
+        """Score version in shadow mode next to CURRENT"""
+        self._write_pointer(CANDIDATE_POINTER, version)
+
+    def clear_candidate(self):
+        """Stop shadow scoring"""
+        try:
+            os.remove(os.path.join(self.root, CANDIDATE_POINTER))
+        except FileNotFoundError:
+            pass
+
+    def load(self, version=None):
+        """
+        Load a version (default: CURRENT)
+
+        Returns:
+            (version, ALSModel), or (None, None) if nothing is current
+        """
+        version = version or self.current_version()
+        if version is None:
+            return None, None
+        return version, ALSModel.load(self.version_path(version))
+
+    def _read_pointer(self, name):
+        try:
+            with open(os.path.join(self.root, name)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def _write_pointer(self, name, version):
+        path = self.version_path(version)
+        if not os.path.isdir(path):
+            raise ValueError(f"Model version {version} does not exist")
+
+        pointer = os.path.join(self.root, name)
+        tmp_pointer = f"{pointer}.tmp-{os.getpid()}"
+        with open(tmp_pointer, 'w') as f:
+            f.write(version + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_pointer, pointer)